@@ -2,7 +2,6 @@
 
 import logging
 from logging.handlers import RotatingFileHandler
-from apscheduler.schedulers.background import BackgroundScheduler
 from flask import Flask
 from dotenv import load_dotenv
 from flask_migrate import Migrate
@@ -21,16 +20,16 @@ from food import food_bp
 from cate import cate_bp
 from ingredient import ingredient_bp
 from scrape import scrape_bp
+from explain import explain_check
 from services import redis_client
 from cache import cache
-from message import msg_send_all
+from extensions import celery, init_celery
+import tasks  # noqa: F401  注册 Celery 任务
 
 
 def create_app():
     load_dotenv()
     app = Flask(__name__)
-    # 创建一个 BackgroundScheduler 实例
-    scheduler = BackgroundScheduler()
     CORS(app, resources={
         r"/*": {"origins": [
             # "http://127.0.0.1:51740",
@@ -41,6 +40,8 @@ def create_app():
     })
     app.config['SQLALCHEMY_DATABASE_URI'] = f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # 由前端服务器（Apache/lighttpd）通过 X-Sendfile 发送图片文件
+    app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE') == '1'
 
     # Configure Redis connection
     redis_host = os.getenv('REDIS_HOST')
@@ -52,7 +53,7 @@ def create_app():
     # app.config['CELERY_RESULT_BACKEND'] = f'redis://{redis_password}@{redis_host}:{redis_port}/0'
 
     db.init_app(app)
-    # celery= init_celery(app)  # 初始化 celery
+    init_celery(app)  # 初始化 celery，任务在应用上下文中执行
     Migrate(app, db)
     redis_client.init_app(app)
 
@@ -69,6 +70,9 @@ def create_app():
     app.register_blueprint(crontab_bp)
     app.register_blueprint(interval_bp)
 
+    # flask explain-check：检查列表与查找查询是否存在全表扫描
+    app.cli.add_command(explain_check)
+
     cache.set('config', {
         'site_name': '管理系统',
         'version': '1.0.0'
@@ -85,18 +89,10 @@ def create_app():
 
     app.logger.addHandler(handler)
 
-
-
-    # 定义定时任务，每天下午5点半执行
-
-    def scheduled_task():
-        with app.app_context():
-            msg_send_all()
-
-    scheduler.add_job(scheduled_task, 'cron', hour=14, minute=5)
-
-    # 启动调度器
-    scheduler.start()
+    # 每日菜单推送由 Celery beat 调度（见 extensions.celery 的 beat_schedule），
+    # 不再在每个 web worker 中各自启动调度器。启动方式：
+    #   celery -A app.celery worker
+    #   celery -A app.celery beat
 
     return app
 
@@ -4,8 +4,7 @@ from flask import Blueprint, request, session
 import constants
 from decorators import response_format
 from models import User
-from services import redis_client
-from cache import cache
+from cache import sessions
 
 
 auth_bp = Blueprint('auth', __name__)
@@ -24,20 +23,11 @@ def login():
     if user is None:
         return {"code":constants.RESULT_FAIL,"message": "用户名或密码错误"}
 
-    # 登录成功，生成 token（这里简单使用用户 ID 作为 token）
-    token = f"user:{user.id}"  # 示例：使用用户名的 ID 作为 token
-
+    # 登录成功，生成 token（客户端以 <timestamp>_<user_id> 的形式回传）
     current_timestamp = int(time.time())
 
-    # 将 token 存储到 Redis，过期时间为 1 小时（3600 秒）
-    redis_client.setex(token, 3600, current_timestamp)
-    # 存储用户信息到会话
-    user_info = {
-        'id': user.id,
-        'username': user.username,
-        'is_admin': user.is_admin
-    }
-    cache.set(str(user.id), user_info)
+    # 将 token 和用户信息存储到同一个 Redis hash，过期时间为 1 小时（3600 秒）
+    sessions.create(user, current_timestamp)
 
     return {
         "code":constants.RESULT_SUCCESS,
@@ -58,12 +48,13 @@ def logout():
     if not token:
         return {"code": constants.RESULT_FAIL, "message": "未提供 token"}
 
-    # 从 Redis 中删除 token
-    redis_client.delete(token)
+    # token 格式与校验时相同（<timestamp>_<user_id>），时间戳与会话一致才删除会话，
+    # 避免旧 token 或伪造的 token 把该用户当前的登录踢下线
+    user_info = sessions.verify(str(token))
+    if user_info is None:
+        return {"code": constants.RESULT_FAIL, "message": "token 无效或已过期"}
 
-    # 可选：从缓存中删除用户信息
-    user_id = token.split(":")[-1]  # 提取用户 ID
-    cache.delete(str(user_id))
+    sessions.delete(user_info['id'])
 
     return {
         "code": constants.RESULT_SUCCESS,
@@ -0,0 +1,121 @@
+# beat_scheduler.py
+import time
+import logging
+from celery.beat import Scheduler
+from celery.schedules import crontab
+from cache import table_versions
+
+logger = logging.getLogger('celery.beat')
+
+# 周期任务依赖的表，任一表的版本号变化都会触发重新加载
+SCHEDULE_TABLES = ('scheduled_tasks', 'crontab_schedules', 'interval_schedules')
+
+
+class DatabaseScheduler(Scheduler):
+    """
+    从 MySQL 加载 ScheduledTask 的 beat 调度器。
+    每隔 check_interval 秒读取一次 Redis 中相关表的版本号（一次 MGET），只有版本号变化时才重新查询数据库；
+    下次触发时间的堆由 celery.beat.Scheduler 维护，调度表变化后自动重建。
+    已在 extensions.celery 中配置为默认调度器，启动：celery -A app.celery beat
+    """
+
+    check_interval = 5  # 检查版本号的间隔（秒）
+    max_interval = 5  # beat 单次最长休眠时间（秒），保证修改能在几秒内生效
+
+    def __init__(self, *args, **kwargs):
+        self.flask_app = None
+        self._versions = None
+        self._last_check = 0
+        super().__init__(*args, **kwargs)
+
+    def setup_schedule(self):
+        # 创建 Flask 应用以访问数据库和 Redis
+        from app import app as flask_app
+        self.flask_app = flask_app
+        self._check_versions(force=True)
+
+    def get_schedule(self):
+        self._check_versions()
+        return self.data
+
+    def set_schedule(self, schedule):
+        self.data = schedule
+
+    schedule = property(get_schedule, set_schedule)
+
+    def apply_async(self, entry, producer=None, advance=True, **kwargs):
+        # 消息头带上本次调度时刻（分钟，Celery 时区），任务据此做幂等（见 tasks.daily_menu_push）；
+        # 在副本上添加，调度表中的 entry 不变，重新加载时仍能与数据库中的配置比较
+        entry = self.reserve(entry) if advance else entry
+        options = dict(entry.options)
+        options['headers'] = dict(options.get('headers') or {}, beat_tick=self.app.now().strftime('%Y%m%d%H%M'))
+        tagged = entry.__class__(**dict(entry, options=options))
+        return super().apply_async(tagged, producer=producer, advance=False, **kwargs)
+
+    def _check_versions(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        try:
+            with self.flask_app.app_context():
+                versions = table_versions(SCHEDULE_TABLES)
+                if force or versions != self._versions:
+                    self.data = self._load_entries()
+                    self._versions = versions
+                    logger.info(f"DatabaseScheduler: 已加载 {len(self.data)} 个周期任务")
+        except Exception as e:
+            # 数据库或 Redis 暂时不可用时继续使用当前调度表
+            logger.error(f"DatabaseScheduler: 加载周期任务失败 {e}")
+
+    def _load_entries(self):
+        from models import ScheduledTask, CrontabSchedule, IntervalSchedule
+
+        entries = {}
+        # 配置文件中的固定任务（beat_schedule）
+        for name, entry in (self.app.conf.beat_schedule or {}).items():
+            entries[name] = self._maybe_entry(name, entry)
+
+        tasks = ScheduledTask.query.filter_by(is_active=True).all()
+        crontab_ids = {task.crontab_id for task in tasks if task.crontab_id}
+        interval_ids = {task.interval_id for task in tasks if task.interval_id}
+        crontabs = {item.id: item for item in CrontabSchedule.query.filter(CrontabSchedule.id.in_(crontab_ids))} if crontab_ids else {}
+        intervals = {item.id: item for item in IntervalSchedule.query.filter(IntervalSchedule.id.in_(interval_ids))} if interval_ids else {}
+
+        for task in tasks:
+            if task.schedule_type == 'crontab' and task.crontab_id in crontabs:
+                schedule = crontabs[task.crontab_id].schedule
+            elif task.schedule_type == 'interval' and task.interval_id in intervals:
+                schedule = intervals[task.interval_id].schedule
+            else:
+                logger.error(f"DatabaseScheduler: 任务 {task.name} 的调度配置无效，跳过")
+                continue
+
+            name = f'task-{task.name}'
+            # 消息头带上周期任务 ID，worker 据此记录运行历史（见 tasks.record_run_end）
+            entries[name] = self.Entry(
+                name=name, task=task.task_type, schedule=schedule, app=self.app,
+                options={'headers': {'scheduled_task_id': task.id}},
+            )
+
+        self._add_default_entries(entries)
+
+        # 未变化的任务保留上次运行时间和次数
+        for name, entry in entries.items():
+            current = self.data.get(name)
+            if current is not None and current.editable_fields_equal(entry):
+                entries[name] = current
+
+        return entries
+
+    def _add_default_entries(self, entries):
+        # 与 Scheduler.install_default_entries 相同的默认任务，但直接合并到新的调度表中
+        # （install_default_entries 会写入 self.schedule，即重新加载前的旧调度表）
+        if self.app.conf.result_expires and not self.app.backend.supports_autoexpire \
+                and 'celery.backend_cleanup' not in entries:
+            entries['celery.backend_cleanup'] = self._maybe_entry('celery.backend_cleanup', {
+                'task': 'celery.backend_cleanup',
+                'schedule': crontab('0', '4', '*'),
+                'options': {'expires': 12 * 3600},
+            })
@@ -0,0 +1,98 @@
+"""
+列表页图片压测：多线程模拟列表页流量，请求 /food 分页后逐个下载该页返回的 thumbs 缩略图，
+分别输出列表接口与图片的每秒请求数和延迟分位数。
+
+    python bench/load_images.py http://127.0.0.1:5000 --token <timestamp>_<user_id> --threads 16 --duration 10
+
+对比 X-Sendfile / X-Accel-Redirect 开启前后的结果时，请经由前端服务器（nginx 等）访问。
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks_manager import percentile  # noqa: E402
+
+
+def fetch(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.read()
+
+
+def worker(args, offset, deadline, stats, lock):
+    local = {'list': [], 'image': []}
+    local_errors = 0
+    page = offset
+    while time.perf_counter() < deadline:
+        # 各线程从不同页开始，在前 --pages 页之间循环
+        list_url = urljoin(args.base, f"/food?page={page % args.pages + 1}&pageSize={args.page_size}")
+        page += 1
+        start = time.perf_counter()
+        try:
+            body = json.loads(fetch(list_url, {'token': args.token}))
+            local['list'].append(time.perf_counter() - start)
+        except (urllib.error.URLError, OSError, ValueError):
+            local_errors += 1
+            continue
+
+        for food in body.get('data') or []:
+            for thumb in food.get('thumbs') or []:
+                start = time.perf_counter()
+                try:
+                    fetch(urljoin(args.base, thumb))
+                    local['image'].append(time.perf_counter() - start)
+                except (urllib.error.URLError, OSError):
+                    local_errors += 1
+
+    with lock:
+        for kind, values in local.items():
+            stats[kind].extend(values)
+        stats['errors'] += local_errors
+
+
+def report(label, latencies, elapsed):
+    latencies.sort()
+    line = f"{label:<6} requests: {len(latencies)}  requests/sec: {len(latencies) / elapsed:.1f}"
+    if latencies:
+        line += f"  p50: {percentile(latencies, 50) * 1000:.1f}ms  p95: {percentile(latencies, 95) * 1000:.1f}ms"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base', help='服务地址，如 http://127.0.0.1:5000')
+    parser.add_argument('--token', required=True, help='登录返回的 token，格式 <timestamp>_<user_id>')
+    parser.add_argument('--pages', type=int, default=5, help='循环请求的列表页数')
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='压测时长（秒）')
+    args = parser.parse_args()
+
+    stats, lock = {'list': [], 'image': [], 'errors': 0}, threading.Lock()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args, index, deadline, stats, lock))
+        for index in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"errors: {stats['errors']}  threads: {args.threads}  elapsed: {elapsed:.1f}s")
+    report('list', stats['list'], elapsed)
+    report('image', stats['image'], elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+login_required 基准：对比改造前（字符串 key + 进程内 dict）与当前实现（会话 hash + token 短时缓存）的每秒请求数。
+
+    python bench/login_required.py --requests 20000
+    python bench/login_required.py --redis-url redis://localhost:6379/15   # 使用真实 Redis，会写入测试 key
+
+默认使用 fakeredis（没有网络往返），此时差异主要来自解析与缓存逻辑；
+往返开销需要接真实 Redis 才能体现。
+"""
+import argparse
+import os
+import sys
+import time
+from functools import wraps
+
+from flask import Flask, g, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import constants  # noqa: E402
+from cache import SessionStore, cache  # noqa: E402
+from decorators import login_required  # noqa: E402
+from services import redis_client  # noqa: E402
+
+TIMESTAMP = '1700000000'
+USER_ID = 1
+
+
+class BenchUser:
+    id = USER_ID
+    username = 'bench'
+    is_admin = True
+
+
+def legacy_login_required(func):
+    # 改造前的实现：GET user:<id> 比较时间戳，用户信息取自进程内 dict
+    @wraps(func)
+    def inner(*args, **kwargs):
+        token = request.headers.get('token')
+        if token:
+            token = token.split('_')
+            current_timestamp = redis_client.get(f"legacy:user:{token[1]}")
+            if current_timestamp:
+                if current_timestamp.decode('utf-8') == token[0]:
+                    user_info = cache.get(token[1])
+                    if user_info:
+                        g.user_info = user_info
+                    return func(*args, **kwargs)
+        return {"code": constants.UNAUTHORIZED, "msg": "Token expired"}
+
+    return inner
+
+
+def create_app(redis_url):
+    app = Flask(__name__)
+    app.config['REDIS_URL'] = redis_url or 'redis://localhost:6379/0'
+    if not redis_url:
+        import fakeredis
+        redis_client.provider_class = fakeredis.FakeRedis
+    redis_client.init_app(app)
+
+    def view():
+        return {"code": constants.RESULT_SUCCESS}
+
+    app.add_url_rule('/legacy', 'legacy', legacy_login_required(view))
+    app.add_url_rule('/current', 'current', login_required(view))
+    return app
+
+
+def run(client, path, count):
+    headers = {'token': f'{TIMESTAMP}_{USER_ID}'}
+    started = time.perf_counter()
+    for _ in range(count):
+        client.get(path, headers=headers)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--redis-url')
+    args = parser.parse_args()
+
+    app = create_app(args.redis_url)
+    client = app.test_client()
+    with app.app_context():
+        user_info = {'id': USER_ID, 'username': BenchUser.username, 'is_admin': True}
+        redis_client.setex(f"legacy:user:{USER_ID}", 3600, TIMESTAMP)
+        cache.set(str(USER_ID), user_info)
+
+        import decorators
+        current = decorators.sessions
+        current.create(BenchUser, TIMESTAMP)
+        uncached = SessionStore(token_ttl=0)
+
+        assert client.get('/legacy', headers={'token': f'{TIMESTAMP}_{USER_ID}'}).get_json()['code'] == constants.RESULT_SUCCESS
+        assert client.get('/current', headers={'token': f'{TIMESTAMP}_{USER_ID}'}).get_json()['code'] == constants.RESULT_SUCCESS
+
+        results = [('before (GET + dict)', run(client, '/legacy', args.requests))]
+        decorators.sessions = uncached
+        results.append(('after, token cache off', run(client, '/current', args.requests)))
+        decorators.sessions = current
+        results.append(('after, token cache on', run(client, '/current', args.requests)))
+
+        redis_client.delete(f"legacy:user:{USER_ID}", f"user:{USER_ID}")
+
+    print(f"requests per variant: {args.requests}  redis: {args.redis_url or 'fakeredis'}")
+    for name, rps in results:
+        print(f"{name:>24}: {rps:8.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+菜谱列表页解析基准：对比 stream / bs4 / lxml 三种后端的每秒页数与峰值内存。
+
+    python bench/parse_recipes.py saved/*.html --repeat 20
+
+不传文件时使用生成的列表页（每页 20 道菜）。
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kitchen import PARSERS, lxml_html  # noqa: E402
+
+SAMPLE_ITEM = '''
+<li><div class="recipe">
+  <div class="cover"><img src="/img/{i}.jpg" alt="cover"></div>
+  <div class="info">
+    <p class="name"><a href="/recipe/{i}/">菜谱 {i}</a></p>
+    <p class="ing ellipsis">五花肉、冰糖、生抽、老抽、料酒、葱、姜</p>
+    <p class="stats">做过 {i} 人 <span class="score">8.{i}</span></p>
+  </div>
+</div></li>
+'''
+
+
+def sample_page(items=20):
+    body = ''.join(SAMPLE_ITEM.format(i=i) for i in range(items))
+    return f'<html><head><title>x</title><script>var p = "<p>";</script></head><body><ul>{body}</ul></body></html>'
+
+
+def run(parse, pages, repeat):
+    # 计时与内存分开测量，tracemalloc 本身会明显拖慢解析
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            parse(html)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for html in pages:
+        parse(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(pages) * repeat / elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', help='保存的列表页 HTML')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, encoding='utf-8') as f:
+                pages.append(f.read())
+    else:
+        pages = [sample_page() for _ in range(10)]
+
+    print(f"pages: {len(pages)} x {args.repeat}")
+    for name, parse in PARSERS.items():
+        if name == 'lxml' and lxml_html is None:
+            print(f"{name:>6}: lxml 未安装，跳过")
+            continue
+        pages_per_sec, peak = run(parse, pages, args.repeat)
+        print(f"{name:>6}: {pages_per_sec:8.1f} pages/sec  peak {peak / 1024:8.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
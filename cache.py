@@ -1,3 +1,10 @@
+import threading
+import time
+from collections import OrderedDict
+from redis.exceptions import ResponseError
+from services import redis_client
+
+
 class Cache:
     _instance = None
     _cache = {}
@@ -20,5 +27,156 @@ class Cache:
     def clear(self):
         self._cache.clear()
 
+
+class LRUCache:
+    """进程内有容量上限、带过期时间的 LRU 缓存"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            # 超出容量时淘汰最久未使用的条目
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def keys(self):
+        with self._lock:
+            return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SessionStore:
+    """
+    登录会话：时间戳与用户信息保存在同一个 Redis hash（user:<id>）中，校验只需一次往返。
+    进程内另有一个按 token 字符串索引的短时缓存，热点客户端在几秒内无需访问 Redis；
+    代价是登出或修改用户后，其他 worker 最多在 token_ttl 秒内仍接受旧 token。
+    """
+
+    def __init__(self, ttl=3600, token_ttl=5, maxsize=4096, prefix='user'):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.tokens = LRUCache(maxsize=maxsize, ttl=token_ttl)
+
+    def _key(self, user_id):
+        return f"{self.prefix}:{user_id}"
+
+    def create(self, user, timestamp):
+        key = self._key(user.id)
+        pipe = redis_client.pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping={
+            'timestamp': timestamp,
+            'id': user.id,
+            'username': user.username,
+            'is_admin': int(bool(user.is_admin)),
+        })
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def verify(self, token):
+        # token 格式：<timestamp>_<user_id>，校验通过返回用户信息，否则返回 None
+        user_info = self.tokens.get(token)
+        if user_info is not None:
+            return user_info
+
+        parts = token.split('_')
+        if len(parts) != 2:
+            return None
+        timestamp, user_id = parts
+
+        pipe = redis_client.pipeline()
+        pipe.hgetall(self._key(user_id))
+        try:
+            session, = pipe.execute()
+        except ResponseError:
+            # 旧版本登录写入的是字符串类型的 key，视为已失效
+            return None
+
+        if not session or session.get(b'timestamp', b'').decode('utf-8') != timestamp:
+            return None
+
+        user_info = {
+            'id': int(session[b'id']),
+            'username': session[b'username'].decode('utf-8'),
+            'is_admin': session[b'is_admin'] == b'1',
+        }
+        self.tokens.set(token, user_info)
+        return user_info
+
+    def update(self, user):
+        # 用户信息变更时同步到已存在的会话中，不存在则不创建
+        key = self._key(user.id)
+        if redis_client.exists(key):
+            redis_client.hset(key, mapping={
+                'username': user.username,
+                'is_admin': int(bool(user.is_admin)),
+            })
+        self._forget(user.id)
+
+    def delete(self, user_id):
+        redis_client.delete(self._key(user_id))
+        self._forget(user_id)
+
+    def _forget(self, user_id):
+        # 清除本进程中该用户的 token 缓存
+        user_id = str(user_id)
+        for token in self.tokens.keys():
+            if token.endswith(f"_{user_id}"):
+                self.tokens.delete(token)
+
+
+VERSION_PREFIX = 'version'  # 每张表的数据版本号，写操作后递增
+
+
+def table_versions(tables):
+    # 一次读取多张表的版本号，未写过的表视为 0
+    if not tables:
+        return []
+    values = redis_client.mget([f"{VERSION_PREFIX}:{table}" for table in tables])
+    return [int(value) if value else 0 for value in values]
+
+
+def bump_version(*tables):
+    # 表数据变更后递增版本号，依赖这些表的缓存随之失效
+    pipe = redis_client.pipeline()
+    for table in tables:
+        pipe.incr(f"{VERSION_PREFIX}:{table}")
+    pipe.execute()
+
+
 # 创建全局单例实例
-cache = Cache()
\ No newline at end of file
+cache = Cache()
+sessions = SessionStore()
@@ -1,7 +1,10 @@
 # food.py
 from flask import Blueprint, request, g
 import constants
-from decorators import login_required, response_format
+from decorators import login_required, response_format, cached_response
+from pagination import paginate
+from cache import bump_version
+from search import apply_search
 from models import db, Cate
 
 cate_bp = Blueprint('cate', __name__)
@@ -35,6 +38,7 @@ def cate_save():
         db.session.add(cate)
 
     db.session.commit()
+    bump_version('cate')
     # 返回成功信息
     return {"code": constants.RESULT_SUCCESS, "cate_id": cate.id}
 
@@ -42,23 +46,19 @@ def cate_save():
 # 获取所有食物项
 @cate_bp.route('/cate', methods=['GET'])
 @login_required
+@cached_response('cate')
 @response_format
 def get_cate():
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
     name = request.args.get('title', '')
 
     # 构建查询
     query = Cate.query
 
     if name:
-        query = query.filter(Cate.name.ilike(f'%{name}%'))
-    # 获取总记录数
-    total = query.count()
-
-    # 分页查询
-    cates = query.offset((page - 1) * page_size).limit(page_size).all()
+        query = apply_search(query, Cate.name, name)
+    # 分页查询（传入 after 时使用游标分页）
+    cates, total, next_cursor = paginate(query, Cate.id)
 
     # 返回数据
     return {
@@ -69,7 +69,8 @@ def get_cate():
                 'name': cate.name,
             } for cate in cates
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
     }
 
 # 删除食物项
@@ -93,4 +94,5 @@ def delete_cate():
 
     db.session.delete(cate)
     db.session.commit()
+    bump_version('cate')
     return {"code": constants.RESULT_SUCCESS, "message": "Cate item deleted successfully"}
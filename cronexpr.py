@@ -0,0 +1,199 @@
+# cronexpr.py
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+MONTH_NAMES = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+DAY_NAMES = ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat']
+
+# 表达式字段顺序：分 时 日 月 星期（与 crontab_save 一致）；(名称, 最小值, 最大值, 名称映射)
+FIELDS = [
+    ('minute', 0, 59, None),
+    ('hour', 0, 23, None),
+    ('day_of_month', 1, 31, None),
+    ('month_of_year', 1, 12, {name: i + 1 for i, name in enumerate(MONTH_NAMES)}),
+    ('day_of_week', 0, 6, {name: i for i, name in enumerate(DAY_NAMES)}),
+]
+
+# 各月最大天数（2 月按闰年计）
+MONTH_DAYS = [31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+# 查找下次触发时间时最多向后搜索的天数，足以覆盖闰年 2 月 29 日
+MAX_SEARCH_DAYS = 366 * 8
+
+
+class CronSyntaxError(ValueError):
+    pass
+
+
+def _bits(start, end, step=1):
+    value = 0
+    for i in range(start, end + 1, step):
+        value |= 1 << i
+    return value
+
+
+def _next_bit(bits, start):
+    # bits 中不小于 start 的最低位，没有则返回 None
+    bits >>= start
+    if not bits:
+        return None
+    return start + (bits & -bits).bit_length() - 1
+
+
+def _parse_value(token, name, low, high, names):
+    token = token.strip().lower()
+    if names and token in names:
+        return names[token]
+    if not token.isdigit():
+        raise CronSyntaxError(f"{name} 的值无效：{token}")
+    value = int(token)
+    if value < low or value > high:
+        raise CronSyntaxError(f"{name} 的值超出范围 {low}-{high}：{value}")
+    return value
+
+
+def _parse_field(text, name, low, high, names):
+    # 解析单个字段，支持 *、*/n、a、a-b、a-b/n、a/n 及逗号分隔的列表，返回 (位集, 规范化字符串)
+    bits = 0
+    parts = []
+    for item in text.split(','):
+        if not item:
+            raise CronSyntaxError(f"{name} 中存在空项：{text}")
+
+        step = 1
+        base = item
+        if '/' in item:
+            base, step_text = item.split('/', 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronSyntaxError(f"{name} 的步长无效：{item}")
+            step = int(step_text)
+
+        if base == '*':
+            start, end = low, high
+            normalized = '*'
+        elif '-' in base:
+            start_text, end_text = base.split('-', 1)
+            start = _parse_value(start_text, name, low, high, names)
+            end = _parse_value(end_text, name, low, high, names)
+            if start > end:
+                raise CronSyntaxError(f"{name} 的范围无效：{item}")
+            normalized = f"{start}-{end}"
+        else:
+            start = _parse_value(base, name, low, high, names)
+            if '/' in item:
+                # a/n 表示从 a 开始到最大值，每隔 n；规范化为 Celery 支持的 a-最大值/n
+                end = high
+                normalized = f"{start}-{end}"
+            else:
+                end = start
+                normalized = str(start)
+
+        bits |= _bits(start, end, step)
+        parts.append(f"{normalized}/{step}" if '/' in item else normalized)
+
+    return bits, ','.join(parts)
+
+
+class CronExpression:
+    """
+    编译后的 crontab 表达式：每个字段为允许取值的位集（第 i 位为 1 表示允许 i）。
+    日期与星期同时生效（AND），与 celery.schedules.crontab 的语义一致。
+    """
+
+    __slots__ = ('minutes', 'hours', 'days', 'months', 'weekdays', 'fields')
+
+    def __init__(self, minutes, hours, days, months, weekdays, fields):
+        self.minutes = minutes
+        self.hours = hours
+        self.days = days
+        self.months = months
+        self.weekdays = weekdays
+        self.fields = fields  # 规范化后的字段字符串，名称已转换为数字
+
+    def __str__(self):
+        return ' '.join(self.fields)
+
+    def as_dict(self):
+        return {name: value for (name, _, _, _), value in zip(FIELDS, self.fields)}
+
+    def _day_matches(self, dt):
+        # isoweekday: 周一 1 ... 周日 7，转换为周日 0
+        return self.days >> dt.day & 1 and self.weekdays >> (dt.isoweekday() % 7) & 1
+
+    def matches(self, dt):
+        return bool(
+            self.minutes >> dt.minute & 1 and self.hours >> dt.hour & 1
+            and self.months >> dt.month & 1 and self._day_matches(dt)
+        )
+
+    def next_run(self, after):
+        """after 之后（不含）的第一次触发时间，时区与 after 相同；无法触发时返回 None"""
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=MAX_SEARCH_DAYS)
+
+        while dt < limit:
+            if not self.months >> dt.month & 1:
+                # 跳到下个月 1 日零点
+                year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+                dt = dt.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+
+            hour = _next_bit(self.hours, dt.hour)
+            if hour is None:
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != dt.hour:
+                dt = dt.replace(hour=hour, minute=0)
+
+            minute = _next_bit(self.minutes, dt.minute)
+            if minute is None:
+                # 本小时内没有可触发的分钟，从下一小时开始
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            return dt.replace(minute=minute)
+
+        return None
+
+    def next_runs(self, after, count):
+        # after 之后的 count 次触发时间
+        results = []
+        dt = after
+        while len(results) < count:
+            dt = self.next_run(dt)
+            if dt is None:
+                break
+            results.append(dt)
+        return results
+
+
+@lru_cache(maxsize=256)
+def compile_expression(expression):
+    """
+    编译 5 段 crontab 表达式（分 时 日 月 星期），按表达式字符串缓存；
+    表达式无效或永远不会触发时抛出 CronSyntaxError
+    """
+    parts = (expression or '').split()
+    if len(parts) != len(FIELDS):
+        raise CronSyntaxError("crontab 表达式应包含 5 段：分 时 日 月 星期")
+
+    bits = []
+    fields = []
+    for text, (name, low, high, names) in zip(parts, FIELDS):
+        value, normalized = _parse_field(text, name, low, high, names)
+        bits.append(value)
+        fields.append(normalized)
+
+    minutes, hours, days, months, weekdays = bits
+    if not any(months >> month & 1 and days & _bits(1, MONTH_DAYS[month - 1]) for month in range(1, 13)):
+        raise CronSyntaxError(f"crontab 表达式永远不会触发：{expression}")
+
+    return CronExpression(minutes, hours, days, months, weekdays, tuple(fields))
+
+
+def next_fire_times(expression, count=5, after=None):
+    # 表达式在 after（默认当前时间）之后的 count 次触发时间
+    return compile_expression(expression).next_runs(after or datetime.now(), count)
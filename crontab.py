@@ -1,8 +1,13 @@
 # food.py
+from datetime import datetime
 from flask import Blueprint, request, g
 import constants
-from decorators import login_required, response_format
-from models import db, CrontabSchedule
+from decorators import login_required, response_format, cached_response
+from pagination import paginate
+from cache import bump_version
+from models import db, CrontabSchedule, ScheduledTask
+from cronexpr import compile_expression, CronSyntaxError
+from extensions import celery
 
 crontab_bp = Blueprint('crontab', __name__)
 
@@ -15,17 +20,17 @@ def crontab_save():
 
     schedule = data.get('schedule')
 
-    # 将调度表达式拆分成各个部分
-    parts = schedule.split()
+    # 保存前编译校验表达式，无效的表达式不会进入调度
+    try:
+        fields = compile_expression(schedule).as_dict()
+    except CronSyntaxError as e:
+        return {"code": constants.RESULT_FAIL, "message": str(e)}
 
-    if len(parts) == 5:
-        minute = parts[0]
-        hour = parts[1]
-        day_of_month = parts[2]
-        month_of_year = parts[3]
-        day_of_week = parts[4]
-    else:
-        return {"code": constants.RESULT_FAIL, "message": "crontab crontab expression"}
+    minute = fields['minute']
+    hour = fields['hour']
+    day_of_month = fields['day_of_month']
+    month_of_year = fields['month_of_year']
+    day_of_week = fields['day_of_week']
 
     if crontab_id and crontab_id > 0:
         crontab = CrontabSchedule.query.get(crontab_id)
@@ -51,26 +56,26 @@ def crontab_save():
 
     db.session.commit()
 
+    # 使用该调度的任务重新计算下次运行时间
+    for task in ScheduledTask.query.filter_by(crontab_id=crontab.id, is_active=True):
+        task.refresh_next_run()
+    db.session.commit()
+    bump_version('crontab_schedules')
+
     # 返回成功信息
     return {"code": constants.RESULT_SUCCESS, "crontab_id": crontab.id}
 
 
 @crontab_bp.route('/crontab', methods=['GET'])
 @login_required
+@cached_response('crontab_schedules')
 @response_format
 def get_crontab():
-    # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
-
     # 构建查询
     query = CrontabSchedule.query
 
-    # 获取总记录数
-    total = query.count()
-
-    # 分页查询
-    crontabs = query.offset((page - 1) * page_size).limit(page_size).all()
+    # 分页查询（传入 after 时使用游标分页）
+    crontabs, total, next_cursor = paginate(query, CrontabSchedule.id)
 
     # 返回数据
     return {
@@ -82,7 +87,37 @@ def get_crontab():
 
             } for crontab in crontabs
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
+    }
+
+
+@crontab_bp.route('/crontab/preview', methods=['GET'])
+@login_required
+@response_format
+def preview_crontab():
+    # 预览表达式（schedule 参数，或已保存的 crontab id）接下来的 count 次触发时间，按 Celery 时区计算
+    schedule = request.args.get('schedule')
+    crontab_id = request.args.get('id', type=int)
+    count = min(max(request.args.get('count', 5, type=int), 1), 50)
+
+    if not schedule and crontab_id:
+        crontab = CrontabSchedule.query.get(crontab_id)
+        if not crontab:
+            return {"code": constants.RESULT_FAIL, "message": "crontab item not found"}
+        schedule = crontab.expression
+
+    try:
+        expression = compile_expression(schedule)
+    except CronSyntaxError as e:
+        return {"code": constants.RESULT_FAIL, "message": str(e)}
+
+    tz = celery.timezone
+    now = datetime.now(tz).replace(tzinfo=None)
+    return {
+        "code": constants.RESULT_SUCCESS,
+        "schedule": str(expression),
+        "data": [run_at.replace(tzinfo=tz) for run_at in expression.next_runs(now, count)],
     }
 
 
@@ -99,6 +134,7 @@ def delete_crontab():
 
     db.session.delete(crontab)
     db.session.commit()
+    bump_version('crontab_schedules')
     return {"code": constants.RESULT_SUCCESS, "message": "crontab item deleted successfully"}
 
 
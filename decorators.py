@@ -1,9 +1,16 @@
-from flask import  request, Response, session, g
+from flask import  request, Response, session, g, stream_with_context
 from functools import wraps
-import json
+import types
+from urllib.parse import urlencode
+import hashlib
 import constants
+from serializer import dumps, dumps_js
+from cache import sessions, table_versions
 from services import redis_client
-from cache import cache
+
+RESPONSE_CACHE_TTL = 300  # 响应缓存的过期时间（秒）
+STREAM_CHUNK_SIZE = 64 * 1024  # 流式输出时每次写出的最小字节数
+
 def response_format(func):
     @wraps(func)
     def decorated_function(*args, **kwargs):
@@ -14,42 +21,109 @@ def response_format(func):
         if isinstance(objects, Response):
             return objects
 
-        # 如果返回的是字典，则进行 JSON 序列化
-        data = json.dumps(objects)
-
         # 检查是否为 JSONP 请求
         callback = request.args.get('callback') or request.form.get('callback')
+
+        # 如果返回的是生成器，逐行序列化为分块输出的 JSON 数组，内存占用与行数无关
+        if isinstance(objects, types.GeneratorType):
+            content_type = 'application/javascript' if callback else 'application/json'
+            return Response(stream_with_context(stream_json_array(objects, callback)), content_type=content_type)
+
+        # 如果返回的是字典，则进行 JSON 序列化
         if callback:
             # 如果有 callback 参数，返回 JSONP 格式
-            data = f'{callback}({data});'
+            data = f'{callback}({dumps_js(objects)});'
             return Response(data, content_type='application/javascript')
 
         # 默认返回 JSON 格式
-        return Response(data, content_type='application/json')
+        return Response(dumps(objects), content_type='application/json')
 
     return decorated_function
 
 
+def stream_json_array(rows, callback=None):
+    # 按块输出 JSON 数组，有 callback 时包装为 JSONP
+    buffer = [f'{callback}([' if callback else '[']
+    size = 0
+    serialize = dumps_js if callback else dumps
+    for index, row in enumerate(rows):
+        chunk = serialize(row)
+        buffer.append(',' + chunk if index else chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(']);' if callback else ']')
+    yield ''.join(buffer)
+
+
+def cached_response(*tables, per_user=False, ttl=RESPONSE_CACHE_TTL):
+    """
+    缓存 response_format 生成的响应，放在 response_format 之外使用。
+    缓存键由路由、查询参数、用户范围和所依赖表的版本号组成，写操作递增版本号即可精确失效；
+    同时输出 ETag，客户端带 If-None-Match 且未变化时返回 304
+    """
+    def decorator(func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            user_info = getattr(g, 'user_info', None)
+            if per_user:
+                scope = str(user_info['id']) if user_info else 'anonymous'
+            else:
+                scope = 'admin' if user_info and user_info['is_admin'] else 'user'
+
+            versions = table_versions(tables)
+            raw = '|'.join([
+                request.path,
+                urlencode(sorted(request.args.items(multi=True))),
+                scope,
+                ','.join(str(version) for version in versions),
+            ])
+            key = f"response:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+            cached = redis_client.hgetall(key)
+            if cached:
+                body = cached[b'body']
+                content_type = cached[b'content_type'].decode('utf-8')
+                etag = cached[b'etag'].decode('utf-8')
+            else:
+                response = func(*args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200 or response.is_streamed:
+                    return response
+
+                body = response.get_data()
+                content_type = response.content_type
+                etag = hashlib.sha1(body).hexdigest()
+                pipe = redis_client.pipeline()
+                pipe.hset(key, mapping={'body': body, 'content_type': content_type, 'etag': etag})
+                pipe.expire(key, ttl)
+                pipe.execute()
+
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                response = Response(body, content_type=content_type)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return inner
+
+    return decorator
+
 
 def login_required(func):
-    # 身份校验
+    # 身份校验：一次 Redis 往返读取会话 hash，热点 token 命中进程内短时缓存时不访问 Redis
     @wraps(func)
     def inner(*args, **kwargs):
         token = request.headers.get('token')
 
         if token:
-            token = token.split('_')
-            key = f"user:{token[1]}"
-
-            # 从 Redis 中读取 token
-            current_timestamp = redis_client.get(key)
-            if current_timestamp:
-                current_timestamp = current_timestamp.decode('utf-8')
-                if current_timestamp == token[0]:
-                    user_info = cache.get(token[1])
-                    if user_info:
-                        g.user_info = user_info
-                    return func(*args, **kwargs)
+            user_info = sessions.verify(token)
+            if user_info:
+                g.user_info = user_info
+                return func(*args, **kwargs)
         return {"code": constants.UNAUTHORIZED, "msg": "Token expired"}
 
 
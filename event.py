@@ -1,13 +1,32 @@
 # event.py
+import json
 from flask import Blueprint, request, jsonify, g
 
 import constants
 from decorators import login_required, response_format
+from pagination import paginate
+from search import apply_search
 from models import db, Event
-from datetime import datetime
+from serializer import dumps
+from services import redis_client
+from datetime import datetime, date, time, timedelta
 
 event_bp = Blueprint('event', __name__)
 
+STATUS_ONGOING = '1'  # 进行中
+STATUS_ENDED = '2'  # 已结束
+PAST_LIMIT = 50  # 倒计时中最多返回的已过去事件数
+
+
+def derive_status(target_date, today=None):
+    # 事件状态由目标日期推导：未到期为进行中，已过期为已结束
+    today = today or date.today()
+    return STATUS_ONGOING if target_date >= today else STATUS_ENDED
+
+
+def countdown_key(user_id):
+    return f"countdown:{user_id}"
+
 # 创建事件
 @event_bp.route('/events/save', methods=['POST'])
 @login_required
@@ -17,11 +36,11 @@ def event_save():
     event_id = data.get('id')  # 事件ID，如果存在则更新，否则创建
     name = data.get('name')
     target_date = data.get('target_date')  # 假设是字符串格式，如 "2023-12-31"
-    status = data.get('status')  # 创建事件的用户ID
     user_info = g.user_info
 
     # 将 target_date 转换为日期对象
     target_date = datetime.strptime(target_date, '%Y-%m-%d').date()
+    status = derive_status(target_date)
 
     if event_id and event_id >0:
         # 更新现有事件
@@ -36,7 +55,7 @@ def event_save():
 
         event.name = name
         event.target_date = target_date
-        event.status = status  # 如果 status 是要更新的字段
+        event.status = status
 
     else:
         # 创建新事件
@@ -44,6 +63,7 @@ def event_save():
         db.session.add(event)
 
     db.session.commit()
+    redis_client.delete(countdown_key(event.user_id))
 
     # 返回成功信息
     return {"code": constants.RESULT_SUCCESS, "event_id": event.id}
@@ -54,24 +74,20 @@ def event_save():
 @response_format
 def get_user_events():
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
     title = request.args.get('title', '')
     user_info = g.user_info
 
     # 构建查询
     query = Event.query
     if user_info and not user_info['is_admin']:
-        query = query.filter(Event.user_id == user_info.id)
+        query = query.filter(Event.user_id == user_info['id'])
     # 如果有搜索关键词，添加过滤条件
     if title:
-        query = query.filter(Event.name.ilike(f'%{title}%'))
-
-    # 获取总记录数
-    total = query.count()
+        query = apply_search(query, Event.name, title)
 
-    # 分页查询
-    events = query.offset((page - 1) * page_size).limit(page_size).all()
+    # 分页查询（传入 after 时使用游标分页）
+    events, total, next_cursor = paginate(query, Event.id)
+    today = date.today()
 
     # 返回数据
     return {
@@ -80,13 +96,69 @@ def get_user_events():
             {
                 'id': event.id,
                 'name': event.name,
-                'status': event.status,
-                'target_date': str(event.target_date)
+                'status': derive_status(event.target_date, today),
+                'target_date': event.target_date
             } for event in events
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
     }
 
+# 倒计时：按距离目标日期的天数分组
+@event_bp.route('/events/countdown', methods=['GET'])
+@login_required
+@response_format
+def get_countdown():
+    """
+    当前用户的事件倒计时，分为 today（今天）、week（1-7 天内）、month（8-30 天内）、
+    later（30 天后）、past（已过去，最近的在前）几组。
+    每组一次 (user_id, target_date) 索引范围查询，结果按用户缓存到当地次日零点
+    """
+    user_info = g.user_info
+    key = countdown_key(user_info['id'])
+
+    cached = redis_client.get(key)
+    if cached:
+        return json.loads(cached)
+
+    today = date.today()
+    ranges = [
+        ('today', today, today),
+        ('week', today + timedelta(days=1), today + timedelta(days=7)),
+        ('month', today + timedelta(days=8), today + timedelta(days=30)),
+        ('later', today + timedelta(days=31), None),
+    ]
+
+    base = Event.query.filter(Event.user_id == user_info['id'])
+    data = {}
+    for bucket, start, end in ranges:
+        query = base.filter(Event.target_date >= start)
+        if end:
+            query = query.filter(Event.target_date <= end)
+        data[bucket] = [__countdown_item(event, today) for event in query.order_by(Event.target_date, Event.id)]
+
+    past = base.filter(Event.target_date < today).order_by(Event.target_date.desc(), Event.id).limit(PAST_LIMIT)
+    data['past'] = [__countdown_item(event, today) for event in past]
+
+    result = {"code": constants.RESULT_SUCCESS, "date": today, "data": data}
+
+    # 缓存到次日零点，过了零点天数全部变化
+    midnight = datetime.combine(today + timedelta(days=1), time.min)
+    redis_client.setex(key, max(1, int((midnight - datetime.now()).total_seconds())), dumps(result))
+    return result
+
+
+def __countdown_item(event, today):
+    days = (event.target_date - today).days
+    return {
+        'id': event.id,
+        'name': event.name,
+        'target_date': event.target_date,
+        'days': abs(days),  # 距离目标日期的天数（未到为剩余天数，已过为已过天数）
+        'status': derive_status(event.target_date, today),
+    }
+
+
 # 删除事件
 @event_bp.route('/events/del', methods=['POST'])
 @login_required
@@ -108,4 +180,5 @@ def delete_event():
 
     db.session.delete(event)
     db.session.commit()
+    redis_client.delete(countdown_key(event.user_id))
     return {"code":constants.RESULT_SUCCESS,"message": "事件删除成功"}
@@ -0,0 +1,81 @@
+# explain.py
+from datetime import datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from models import (db, User, Event, ScheduledTask, CrontabSchedule, IntervalSchedule,
+                    Food, Image, Cate, Ingredient, FoodCate, FoodIngredient)
+from search import apply_search
+from pagination import count_query, offset_query, cursor_query
+
+
+def list_queries():
+    """各列表接口的基础查询，过滤条件与视图函数一致，参数值不影响执行计划"""
+    return [
+        ('food', Food.query, Food.id),
+        ('food search', apply_search(Food.query, Food.name, '红烧'), Food.id),
+        ('ingredient', Ingredient.query, Ingredient.id),
+        ('cate', Cate.query, Cate.id),
+        ('user', User.query, User.id),
+        # 管理员查看全部事件，不带 user_id 过滤
+        ('event (admin)', Event.query, Event.id),
+        ('event', Event.query.filter(Event.user_id == 1), Event.id),
+        ('task', ScheduledTask.query, ScheduledTask.id),
+        ('task due', ScheduledTask.query.filter(ScheduledTask.is_active == True,
+                                                ScheduledTask.next_run_at <= datetime(2024, 1, 1)), ScheduledTask.id),
+        ('crontab', CrontabSchedule.query, CrontabSchedule.id),
+        ('interval', IntervalSchedule.query, IntervalSchedule.id),
+    ]
+
+
+def checked_queries():
+    """
+    返回 (名称, 查询, 是否豁免)。
+    列表查询通过 pagination 中与 paginate 相同的函数构建：游标分页的第一页和后续页必须走索引；
+    未传 after 时的偏移分页与 count 总数不带过滤条件时本来就要扫描，列为豁免，只输出执行计划不判失败。
+    """
+    page_size = 10
+    checked = []
+    for label, query, column in list_queries():
+        checked.append((f'{label} cursor first', cursor_query(query, column, None, page_size), False))
+        checked.append((f'{label} cursor next', cursor_query(query, column, 1, page_size), False))
+        checked.append((f'{label} offset', offset_query(query, 1, page_size), True))
+        checked.append((f'{label} count', count_query(query), True))
+
+    checked += [(label, query, False) for label, query in [
+        ('food by name', Food.query.filter(Food.name.in_(['红烧肉', '糖醋排骨']))),
+        ('ingredient by name', Ingredient.query.filter(Ingredient.name.in_(['猪肉', '糖']))),
+        ('task by name', ScheduledTask.query.filter_by(name='task')),
+        ('food_ingredient by food', FoodIngredient.query.filter(FoodIngredient.food_id.in_([1, 2]))),
+        ('food_ingredient by ingredient', FoodIngredient.query.filter(FoodIngredient.ingredient_id == 1)),
+        ('food_cate by food', FoodCate.query.filter(FoodCate.food_id.in_([1, 2]))),
+        ('food_cate by cate', FoodCate.query.filter(FoodCate.cate_id == 1)),
+        ('image by food', Image.query.filter(Image.food_id.in_([1, 2]))),
+        ('event by user and date', Event.query.filter(Event.user_id == 1, Event.target_date >= '2024-01-01')),
+        ('event by date', Event.query.filter(Event.target_date.in_(['2024-01-01', '2024-01-02']))),
+    ]]
+    return checked
+
+
+@click.command('explain-check')
+@with_appcontext
+def explain_check():
+    """
+    对列表与查找查询执行 EXPLAIN，出现全表扫描（type=ALL）时以非零状态退出。
+    表数据很少时 MySQL 可能主动选择全表扫描，应在有一定数据量的库上运行。
+    """
+    dialect = db.engine.dialect
+    failed = []
+    for label, query, exempt in checked_queries():
+        sql = str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+        rows = db.session.execute(text(f"EXPLAIN {sql}")).mappings().all()
+        for row in rows:
+            access = row.get('type')
+            note = ' (豁免)' if exempt else ''
+            click.echo(f"{label:<32} {row.get('table')!s:<20} type={access} key={row.get('key')}{note}")
+            if access == 'ALL' and not exempt:
+                failed.append(f"{label} ({row.get('table')})")
+
+    if failed:
+        raise click.ClickException("全表扫描：" + ', '.join(failed))
+    click.echo("没有发现全表扫描")
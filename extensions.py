@@ -1,5 +1,6 @@
 from flask import Flask
 from celery import Celery, Task
+from celery.schedules import crontab
 from flask_sqlalchemy import SQLAlchemy
 import os
 import logging
@@ -27,7 +28,20 @@ celery.conf.update(
     enable_utc=True,
     imports=['tasks'],
     include=['tasks'],
-    task_autodiscover_packages=['tasks']
+    task_autodiscover_packages=['tasks'],
+    beat_scheduler='beat_scheduler:DatabaseScheduler',  # 周期任务从数据库加载，见 beat_scheduler.py
+    beat_schedule={
+        # 每天 14:05 推送今日菜单
+        'daily-menu-push': {
+            'task': 'tasks.daily_menu_push',
+            'schedule': crontab(hour=14, minute=5),
+        },
+        # 每天 9:00 推送事件提醒
+        'event-reminder-push': {
+            'task': 'tasks.event_reminder_push',
+            'schedule': crontab(hour=9, minute=0),
+        },
+    },
 )
 
 # 配置日志
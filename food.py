@@ -1,11 +1,24 @@
 # food.py
-from flask import Blueprint, request, g
+import json
+from flask import Blueprint, request, g, Response, stream_with_context
+from sqlalchemy import insert
+from sqlalchemy.orm import selectinload
 import constants
-from decorators import login_required, response_format
-from models import db, Food, Image, Cate, FoodIngredient, FoodCate
+from decorators import login_required, response_format, cached_response, admin_required
+from pagination import paginate
+from cache import bump_version
+from search import apply_search
+from models import db, Food, Image, Cate, Ingredient, FoodIngredient, FoodCate
+from food_index import sync_food_index, match_foods
+from resolver import NameResolver
+from serializer import dumps
+from image import thumbnail_url
 
 food_bp = Blueprint('food', __name__)
 
+EXPORT_BATCH_SIZE = 500  # 导出时每批从数据库读取、写出的菜数
+IMPORT_BATCH_SIZE = 500  # 导入时每批写入的菜数
+
 # 创建食物项
 # 创建食物项
 @food_bp.route('/food/save', methods=['POST'])
@@ -42,10 +55,19 @@ def food_save():
         )
         db.session.add(food)
 
-    db.session.commit()
-    __save_goods_img(image_list, food)
-    __save_goods_cate(cate_list,food)
-    __save_goods_ingredients(ingredients_list,food)
+    # 菜和图片、分类、食材关联在同一个事务中保存，失败时整体回滚
+    try:
+        db.session.flush()  # 获取新菜的 ID
+        __save_goods_img(image_list, food)
+        __save_goods_cate(cate_list,food)
+        __save_goods_ingredients(ingredients_list,food)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return {"code": constants.RESULT_FAIL, "message": str(e)}
+
+    sync_food_index([food.id])
+    bump_version('food')
 
     # 返回成功信息
     return {"code": constants.RESULT_SUCCESS, "food_id": food.id}
@@ -54,23 +76,23 @@ def food_save():
 # 获取所有食物项
 @food_bp.route('/food', methods=['GET'])
 @login_required
+@cached_response('food', 'ingredient')
 @response_format
 def get_foods():
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
     name = request.args.get('title', '')
 
-    # 构建查询
-    query = Food.query
+    # 构建查询，关联数据按批次预加载，避免逐行懒加载带来的 N+1 查询
+    query = Food.query.options(
+        selectinload(Food.cate),
+        selectinload(Food.images),
+        selectinload(Food.ingredient).joinedload(FoodIngredient.ingredient),
+    )
 
     if name:
-        query = query.filter(Food.name.ilike(f'%{name}%'))
-    # 获取总记录数
-    total = query.count()
-
-    # 分页查询
-    foods = query.offset((page - 1) * page_size).limit(page_size).all()
+        query = apply_search(query, Food.name, name)
+    # 分页查询（传入 after 时使用游标分页）
+    foods, total, next_cursor = paginate(query, Food.id)
 
 
 
@@ -85,12 +107,207 @@ def get_foods():
                 'ingredients': [ingredient.id for ingredient in food.ingredient],
                 'ing_names' : [food_ingredient.ingredient.name for food_ingredient in food.ingredient],
                 'procedure': food.procedure,
-                'images': [image.url for image in food.images]
+                'images': [image.url for image in food.images],
+                'thumbs': [thumbnail_url(image.url) for image in food.images]
             } for food in foods
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
+    }
+
+# 根据已有食材推荐能做的菜
+@food_bp.route('/food/match', methods=['GET'])
+@login_required
+@response_format
+def match_food():
+    ingredients = request.args.get('ingredients', '')  # 食材ID，逗号分隔
+    limit = min(request.args.get('limit', 20, type=int), 100)
+
+    try:
+        ingredient_ids = [int(ingredient_id) for ingredient_id in ingredients.split(',') if ingredient_id.strip()]
+    except ValueError:
+        return {"code": constants.RESULT_FAIL, "message": "Invalid ingredients"}
+
+    matches = match_foods(ingredient_ids, limit)
+    names = {}
+    if matches:
+        names = dict(db.session.query(Food.id, Food.name).filter(Food.id.in_([food_id for food_id, _, _ in matches])).all())
+
+    return {
+        "code": constants.RESULT_SUCCESS,
+        'data': [
+            {
+                'id': food_id,
+                'name': names[food_id],
+                'matched': matched,
+                'required': required,
+                'coverage': round(matched / required, 4),
+            } for food_id, matched, required in matches if food_id in names
+        ]
     }
 
+# 以 NDJSON 流式导出全部菜谱
+@food_bp.route('/food/export', methods=['GET'])
+@login_required
+@admin_required
+@response_format
+def export_foods():
+    def generate():
+        # 按 id 游标分页读取，每页的关联数据用 selectinload 预加载；
+        # 不使用 yield_per：MySQL 的服务端游标未读完时不能在同一连接上执行预加载查询
+        last_id = 0
+        while True:
+            foods = Food.query.options(
+                selectinload(Food.cate).joinedload(FoodCate.cate),
+                selectinload(Food.images),
+                selectinload(Food.ingredient).joinedload(FoodIngredient.ingredient),
+            ).filter(Food.id > last_id).order_by(Food.id).limit(EXPORT_BATCH_SIZE).all()
+            if not foods:
+                break
+
+            yield '\n'.join(dumps({
+                'name': food.name,
+                'procedure': food.procedure,
+                'cate': [food_cate.cate.name for food_cate in food.cate],
+                'ingredients': [food_ingredient.ingredient.name for food_ingredient in food.ingredient],
+                'images': [image.url for image in food.images],
+            }) for food in foods) + '\n'
+
+            last_id = foods[-1].id
+            # 释放本页对象，导出过程中内存保持在一页以内
+            db.session.expunge_all()
+            if len(foods) < EXPORT_BATCH_SIZE:
+                break
+
+    return Response(
+        stream_with_context(generate()),
+        content_type='application/x-ndjson',
+        headers={'Content-Disposition': 'attachment; filename=foods.ndjson'},
+    )
+
+
+# 从 NDJSON 流式导入菜谱，按菜名去重
+@food_bp.route('/food/import', methods=['POST'])
+@login_required
+@admin_required
+@response_format
+def import_foods():
+    user_info = g.user_info
+    summary = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0}
+    cate_resolver = NameResolver(Cate, user_id=user_info['id'])
+    ingredient_resolver = NameResolver(Ingredient, user_id=user_info['id'])
+
+    batch = []
+    try:
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            summary['read'] += 1
+
+            try:
+                item = __clean_item(json.loads(line))
+            except ValueError:
+                item = None
+            if item is None:
+                summary['invalid'] += 1
+                continue
+
+            batch.append(item)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                __import_batch(batch, user_info['id'], cate_resolver, ingredient_resolver, summary)
+                batch = []
+        if batch:
+            __import_batch(batch, user_info['id'], cate_resolver, ingredient_resolver, summary)
+    except Exception as e:
+        db.session.rollback()
+        return {"code": constants.RESULT_FAIL, "message": str(e), "data": summary}
+
+    return {"code": constants.RESULT_SUCCESS, "data": summary}
+
+
+def __import_batch(batch, user_id, cate_resolver, ingredient_resolver, summary):
+    """批量写入一批菜谱：一次查询过滤已存在的菜名，菜和关联记录各一次批量插入，一个事务提交"""
+    unique = {}
+    for item in batch:
+        unique.setdefault(item['name'], item)
+
+    existing = {row[0] for row in db.session.query(Food.name).filter(Food.name.in_(list(unique))).all()}
+    items = {name: item for name, item in unique.items() if name not in existing}
+    summary['duplicates'] += len(batch) - len(items)
+    if not items:
+        return
+
+    try:
+        cate_ids = cate_resolver.resolve(name for item in items.values() for name in item['cate'])
+        ingredient_ids = ingredient_resolver.resolve(name for item in items.values() for name in item['ingredients'])
+
+        db.session.execute(insert(Food), [
+            {'name': name, 'procedure': item['procedure'], 'user_id': user_id}
+            for name, item in items.items()
+        ])
+        food_ids = dict(db.session.query(Food.name, Food.id).filter(Food.name.in_(list(items))).all())
+
+        cate_rows, ingredient_rows, image_rows = [], [], []
+        for name, item in items.items():
+            food_id = food_ids.get(name)
+            if not food_id:
+                continue
+            for cate in item['cate']:
+                if cate in cate_ids:
+                    cate_rows.append({'food_id': food_id, 'cate_id': cate_ids[cate]})
+            for ingredient in item['ingredients']:
+                if ingredient in ingredient_ids:
+                    ingredient_rows.append({'food_id': food_id, 'ingredient_id': ingredient_ids[ingredient]})
+            for url in item['images']:
+                image_rows.append({'food_id': food_id, 'url': url})
+
+        for model, rows in ((FoodCate, cate_rows), (FoodIngredient, ingredient_rows), (Image, image_rows)):
+            if rows:
+                db.session.execute(insert(model), rows)
+        db.session.commit()
+    except Exception:
+        # 回滚后缓存的新分类、食材 ID 已失效
+        cate_resolver.memo.clear()
+        ingredient_resolver.memo.clear()
+        raise
+
+    summary['inserted'] += len(food_ids)
+    sync_food_index(food_ids.values())
+    bump_version('food', 'cate', 'ingredient')
+
+
+def __clean_item(item):
+    """校验并规整一行导入数据，字段类型不对时返回 None，整行计为 invalid"""
+    if not isinstance(item, dict):
+        return None
+    name = item.get('name')
+    procedure = item.get('procedure')
+    if not isinstance(name, str) or not name.strip():
+        return None
+    if procedure is not None and not isinstance(procedure, str):
+        return None
+
+    cate = __clean_names(item.get('cate'))
+    ingredients = __clean_names(item.get('ingredients'))
+    images = __clean_names(item.get('images'), types=(str,))
+    if cate is None or ingredients is None or images is None:
+        return None
+
+    return {'name': name.strip(), 'procedure': procedure or '', 'cate': cate,
+            'ingredients': ingredients, 'images': images}
+
+
+def __clean_names(names, types=(str, int, float)):
+    # 去掉空白和重复的名称，保持顺序；不是列表或含有其他类型的元素时返回 None
+    if names is None:
+        return []
+    if not isinstance(names, list) or any(
+            isinstance(name, bool) or not isinstance(name, types) for name in names if name is not None):
+        return None
+    return list(dict.fromkeys(str(name).strip() for name in names if name is not None and str(name).strip()))
+
+
 # 删除食物项
 @food_bp.route('/food/del', methods=['POST'])
 @login_required
@@ -112,71 +329,51 @@ def delete_food():
 
     db.session.delete(food)
     db.session.commit()
+    sync_food_index([food_id])
+    bump_version('food')
     return {"code": constants.RESULT_SUCCESS, "message": "Food item deleted successfully"}
 
 
-def __save_goods_img(image_list, new_food):
+def __sync_food_rows(model, field, values, new_food, convert=None, ordered=False):
+    """
+    按差异同步菜的关联记录：只删除不再需要的行、批量插入新增的行，不在此处提交。
+    ordered 为 True 时若保留行的顺序与传入顺序不一致，则整体重写以保持顺序。
+    """
     if not new_food or not new_food.id:
         raise ValueError("Invalid food information provided.")
 
-    # 清除旧的图片记录
-    Image.query.filter_by(food_id=new_food.id).delete()
-
-    if image_list:
-        for img in image_list:
-            if img:
-                goods_img = Image(url=img, food_id=new_food.id)  # 直接设置 food_id
-                try:
-                    db.session.add(goods_img)  # 添加新的 Image 实例
-                    db.session.commit()  # 提交会话
-                except Exception as e:
-                    db.session.rollback()  # 回滚会话
-                    print(f"Error saving image {img}: {e}")
-            else:
-                print("Received an empty image URL.")
-    else:
-        print("No images provided to save.")
+    column = getattr(model, field)
+    wanted = [convert(value) if convert else value for value in (values or []) if value]
+    wanted = list(dict.fromkeys(wanted))  # 去重并保持顺序
+
+    existing = db.session.query(model.id, column).filter(model.food_id == new_food.id).order_by(model.id).all()
+    kept = {}
+    stale_ids = []
+    for row_id, value in existing:
+        if value in kept or value not in wanted:
+            stale_ids.append(row_id)
+        else:
+            kept[value] = row_id
+
+    if ordered and [value for value in wanted if value in kept] != list(kept):
+        stale_ids = [row_id for row_id, _ in existing]
+        kept = {}
+
+    if stale_ids:
+        db.session.query(model).filter(model.id.in_(stale_ids)).delete(synchronize_session=False)
+
+    added = [{'food_id': new_food.id, field: value} for value in wanted if value not in kept]
+    if added:
+        db.session.execute(insert(model), added)
+
+
+def __save_goods_img(image_list, new_food):
+    __sync_food_rows(Image, 'url', image_list, new_food, ordered=True)
+
 
 def __save_goods_cate(cate_list, new_food):
-    if not new_food or not new_food.id:
-        raise ValueError("Invalid food information provided.")
+    __sync_food_rows(FoodCate, 'cate_id', cate_list, new_food, convert=int)
 
-    # 清除旧的图片记录
-    FoodCate.query.filter_by(food_id=new_food.id).delete()
-
-    if cate_list:
-        for cate in cate_list:
-            if cate:
-                goods_cate = FoodCate(cate_id=cate, food_id=new_food.id)  # 直接设置 food_id
-                try:
-                    db.session.add(goods_cate)  # 添加新的 Image 实例
-                    db.session.commit()  # 提交会话
-                except Exception as e:
-                    db.session.rollback()  # 回滚会话
-                    print(f"Error saving cate {cate}: {e}")
-            else:
-                print("Received an empty cate name.")
-    else:
-        print("No cate provided to save.")
 
 def __save_goods_ingredients(ingredients_list, new_food):
-    if not new_food or not new_food.id:
-        raise ValueError("Invalid food information provided.")
-
-    # 清除旧的图片记录
-    FoodIngredient.query.filter_by(food_id=new_food.id).delete()
-
-    if ingredients_list:
-        for ingredients in ingredients_list:
-            if ingredients:
-                goods_ingredients = FoodIngredient(ingredient_id=ingredients, food_id=new_food.id)  # 直接设置 food_id
-                try:
-                    db.session.add(goods_ingredients)  # 添加新的 Image 实例
-                    db.session.commit()  # 提交会话
-                except Exception as e:
-                    db.session.rollback()  # 回滚会话
-                    print(f"Error saving ingredients {ingredients}: {e}")
-            else:
-                print("Received an empty ingredients URL.")
-    else:
-        print("No ingredients provided to save.")
\ No newline at end of file
+    __sync_food_rows(FoodIngredient, 'ingredient_id', ingredients_list, new_food, convert=int)
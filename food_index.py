@@ -0,0 +1,171 @@
+# food_index.py
+import uuid
+from collections import defaultdict
+from sqlalchemy import distinct
+from models import db, FoodIngredient
+from services import redis_client
+
+ELIGIBLE_KEY = 'food:eligible'  # 有食材的菜 id 集合，用于随机选菜
+ELIGIBLE_READY_KEY = 'food:eligible:ready'  # 索引已完整建立的标记
+REVERSE_READY_KEY = 'food:reverse:ready'  # 食材 -> 菜倒排索引已完整建立的标记
+COUNT_KEY = 'food:ingredient_count'  # 每道菜所需食材数（zset：菜 id -> 食材数）
+BATCH_SIZE = 1000
+MATCH_CANDIDATES = 10  # 按命中食材数预取 limit 的多少倍候选菜再计算覆盖率
+
+
+def ingredient_foods_key(ingredient_id):
+    # 使用某食材的菜 id 集合
+    return f"ingredient:foods:{ingredient_id}"
+
+
+def food_ingredients_key(food_id):
+    # 某道菜所需的食材 id 集合
+    return f"food:ingredients:{food_id}"
+
+
+def rebuild_eligible():
+    # 从 food_ingredient 全量重建索引，只在索引缺失时执行一次
+    food_ids = [row[0] for row in db.session.query(distinct(FoodIngredient.food_id)).all()]
+
+    pipe = redis_client.pipeline()
+    pipe.delete(ELIGIBLE_KEY)
+    for i in range(0, len(food_ids), BATCH_SIZE):
+        pipe.sadd(ELIGIBLE_KEY, *food_ids[i:i + BATCH_SIZE])
+    pipe.set(ELIGIBLE_READY_KEY, 1)
+    pipe.execute()
+
+
+def ensure_eligible():
+    if not redis_client.exists(ELIGIBLE_READY_KEY):
+        rebuild_eligible()
+
+
+def rebuild_reverse():
+    # 从 food_ingredient 全量重建倒排索引，只在索引缺失时执行一次
+    food_ingredients = defaultdict(set)
+    query = db.session.query(FoodIngredient.food_id, FoodIngredient.ingredient_id).yield_per(BATCH_SIZE)
+    for food_id, ingredient_id in query:
+        food_ingredients[food_id].add(ingredient_id)
+
+    ingredient_foods = defaultdict(set)
+    for food_id, ingredient_ids in food_ingredients.items():
+        for ingredient_id in ingredient_ids:
+            ingredient_foods[ingredient_id].add(food_id)
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.delete(COUNT_KEY)
+    for food_id, ingredient_ids in food_ingredients.items():
+        pipe.delete(food_ingredients_key(food_id))
+        pipe.sadd(food_ingredients_key(food_id), *ingredient_ids)
+    for ingredient_id, food_ids in ingredient_foods.items():
+        pipe.delete(ingredient_foods_key(ingredient_id))
+        pipe.sadd(ingredient_foods_key(ingredient_id), *food_ids)
+    food_ids = list(food_ingredients)
+    for i in range(0, len(food_ids), BATCH_SIZE):
+        pipe.zadd(COUNT_KEY, {food_id: len(food_ingredients[food_id]) for food_id in food_ids[i:i + BATCH_SIZE]})
+    pipe.set(REVERSE_READY_KEY, 1)
+    pipe.execute()
+
+
+def ensure_reverse():
+    if not redis_client.exists(REVERSE_READY_KEY):
+        rebuild_reverse()
+
+
+def sync_food_index(food_ids):
+    """按数据库中当前的食材关联，增量更新指定菜的可选菜索引和食材倒排索引"""
+    food_ids = {food_id for food_id in food_ids if food_id}
+    if not food_ids:
+        return
+
+    pipe = redis_client.pipeline()
+    pipe.exists(ELIGIBLE_READY_KEY)
+    pipe.exists(REVERSE_READY_KEY)
+    eligible_ready, reverse_ready = pipe.execute()
+
+    # 索引尚未建立时无需增量维护，首次使用时会整体重建
+    if not eligible_ready and not reverse_ready:
+        return
+
+    current = {food_id: set() for food_id in food_ids}
+    rows = db.session.query(FoodIngredient.food_id, FoodIngredient.ingredient_id) \
+        .filter(FoodIngredient.food_id.in_(food_ids)).all()
+    for food_id, ingredient_id in rows:
+        current[food_id].add(ingredient_id)
+
+    previous = {}
+    if reverse_ready:
+        pipe = redis_client.pipeline()
+        ordered_ids = list(current)
+        for food_id in ordered_ids:
+            pipe.smembers(food_ingredients_key(food_id))
+        previous = {
+            food_id: {int(ingredient_id) for ingredient_id in members}
+            for food_id, members in zip(ordered_ids, pipe.execute())
+        }
+
+    pipe = redis_client.pipeline()
+    if eligible_ready:
+        eligible = [food_id for food_id, ingredient_ids in current.items() if ingredient_ids]
+        removed = [food_id for food_id, ingredient_ids in current.items() if not ingredient_ids]
+        if eligible:
+            pipe.sadd(ELIGIBLE_KEY, *eligible)
+        if removed:
+            pipe.srem(ELIGIBLE_KEY, *removed)
+
+    if reverse_ready:
+        for food_id, ingredient_ids in current.items():
+            old_ids = previous.get(food_id, set())
+            for ingredient_id in old_ids - ingredient_ids:
+                pipe.srem(ingredient_foods_key(ingredient_id), food_id)
+            for ingredient_id in ingredient_ids - old_ids:
+                pipe.sadd(ingredient_foods_key(ingredient_id), food_id)
+
+            pipe.delete(food_ingredients_key(food_id))
+            if ingredient_ids:
+                pipe.sadd(food_ingredients_key(food_id), *ingredient_ids)
+                pipe.zadd(COUNT_KEY, {food_id: len(ingredient_ids)})
+            else:
+                pipe.zrem(COUNT_KEY, food_id)
+    pipe.execute()
+
+
+def random_eligible(count):
+    # 随机取 count 个不重复的菜 id
+    ensure_eligible()
+    return [int(food_id) for food_id in redis_client.srandmember(ELIGIBLE_KEY, count)]
+
+
+def match_foods(ingredient_ids, limit=20):
+    """
+    按已有食材查找能做的菜，按覆盖率（所需食材中已有的比例）从高到低排序，
+    返回 [(菜 id, 已有食材数, 所需食材数), ...]
+
+    并集只在 Redis 中按命中食材数取前 limit * MATCH_CANDIDATES 个候选，
+    再计算覆盖率排序，常用食材命中上万道菜时也不会整体读回。
+    """
+    ingredient_ids = list(dict.fromkeys(ingredient_ids))
+    if not ingredient_ids:
+        return []
+    ensure_reverse()
+
+    # 各食材的菜集合求并集，分值即为该菜命中的食材数
+    tmp_key = f"tmp:match:{uuid.uuid4().hex}"
+    pipe = redis_client.pipeline()
+    pipe.zunionstore(tmp_key, [ingredient_foods_key(ingredient_id) for ingredient_id in ingredient_ids])
+    pipe.zrange(tmp_key, 0, limit * MATCH_CANDIDATES - 1, desc=True, withscores=True)
+    pipe.delete(tmp_key)
+    _, candidates, _ = pipe.execute()
+    if not candidates:
+        return []
+
+    food_ids = [int(food_id) for food_id, _ in candidates]
+    required = redis_client.zmscore(COUNT_KEY, food_ids)
+
+    results = []
+    for food_id, (_, matched), total in zip(food_ids, candidates, required):
+        total = int(total or matched)
+        results.append((food_id, int(matched), total))
+
+    results.sort(key=lambda item: (-item[1] / item[2], -item[1], item[0]))
+    return results[:limit]
@@ -1,9 +1,15 @@
 # image.py
-from flask import Blueprint, request
+from flask import Blueprint, request, Response, send_from_directory, abort
+from werkzeug.security import safe_join
+import hashlib
+import mimetypes
 import os
+import re
+import tempfile
 import constants
 from decorators import login_required, response_format
-from werkzeug.utils import secure_filename
+from extensions import celery
+from PIL import Image as PILImage
 
 image_bp = Blueprint('image', __name__)
 
@@ -11,16 +17,129 @@ image_bp = Blueprint('image', __name__)
 # 设置允许上传的文件类型
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 MAX_FILE_SIZE = 1 * 1024 * 1024  # 1MB
+MULTIPART_OVERHEAD = 16 * 1024  # multipart 边界、表单头等额外字节的上限
+IMAGE_FILE_MODE = 0o644  # 上传的原图需对 nginx / X-Sendfile 可读
+CHUNK_SIZE = 64 * 1024  # 分块写入磁盘的大小
+IMAGE_URL_PREFIX = '/img'
+IMAGE_MAX_AGE = 365 * 86400  # 内容寻址的图片永不变化，缓存一年
+LEGACY_MAX_AGE = 3600  # 旧的按原文件名保存的图片可能被覆盖，只缓存一小时
+# nginx 的 internal location 前缀，设置后由 nginx 直接发送文件（X-Accel-Redirect）
+IMAGE_ACCEL_REDIRECT = os.getenv('IMAGE_ACCEL_REDIRECT')
+# 缩略图尺寸（最长边像素），每种尺寸同时生成原格式和 WebP 两个版本
+VARIANT_SIZES = {'thumb': 200, 'medium': 600}
+HASHED_NAME = re.compile(r'^[0-9a-f]{64}$')
+HASHED_FILE = re.compile(r'^[0-9a-f]{64}(_[a-z]+)?\.[a-z]+$')
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# 创建事件
+
+def image_urls(filename):
+    # 内容寻址的文件名可推导出所有尺寸的 URL
+    stem, ext = os.path.splitext(filename)
+    urls = {'original': f"{IMAGE_URL_PREFIX}/{filename}"}
+    if HASHED_NAME.match(stem):
+        for name in VARIANT_SIZES:
+            urls[name] = f"{IMAGE_URL_PREFIX}/{stem}_{name}{ext}"
+            urls[f"{name}_webp"] = f"{IMAGE_URL_PREFIX}/{stem}_{name}.webp"
+    return urls
+
+
+def thumbnail_url(url):
+    # 列表页使用的缩略图，旧的非内容寻址图片没有缩略图时返回原图
+    return image_urls(os.path.basename(url)).get('thumb', url)
+
+
+def generate_variants(path):
+    """生成各尺寸缩略图及其 WebP 版本，先写临时文件再原子替换"""
+    root, ext = os.path.splitext(path)
+    with PILImage.open(path) as img:
+        image_format = img.format
+        for name, size in VARIANT_SIZES.items():
+            variant = img.copy()
+            variant.thumbnail((size, size))
+            if image_format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+                variant = variant.convert('RGB')
+
+            for target, target_format in ((f"{root}_{name}{ext}", image_format), (f"{root}_{name}.webp", 'WEBP')):
+                tmp_path = f"{target}.part"
+                variant.save(tmp_path, format=target_format)
+                os.replace(tmp_path, target)
+
+
+def variants_missing(path):
+    root, ext = os.path.splitext(path)
+    return not all(
+        os.path.exists(target)
+        for name in VARIANT_SIZES
+        for target in (f"{root}_{name}{ext}", f"{root}_{name}.webp")
+    )
+
+
+def image_folder():
+    from app import BASE_DIR
+    return os.path.join(BASE_DIR, 'static/image')
+
+
+# 图片访问：内容寻址的 URL 永久缓存，支持 Range 请求，可交给 nginx / X-Sendfile 发送
+@image_bp.route(f'{IMAGE_URL_PREFIX}/<filename>', methods=['GET'])
+def serve_image(filename):
+    folder = image_folder()
+    path = safe_join(folder, filename)
+    if path is None:
+        abort(404)
+
+    immutable = bool(HASHED_FILE.match(filename))
+    fallback = False
+    if not os.path.isfile(path):
+        # 缩略图尚未生成时先返回原图，且不允许缓存，缩略图生成后立即生效
+        filename = __original_of(filename, folder) if immutable else None
+        if not filename:
+            abort(404)
+        immutable = False
+        fallback = True
+
+    max_age = 0 if fallback else IMAGE_MAX_AGE if immutable else LEGACY_MAX_AGE
+    if IMAGE_ACCEL_REDIRECT:
+        response = Response(content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{IMAGE_ACCEL_REDIRECT.rstrip('/')}/{filename}"
+    else:
+        # conditional=True 处理 Range / If-Modified-Since；USE_X_SENDFILE 开启时输出 X-Sendfile，
+        # 否则经 wsgi.file_wrapper 发送（gunicorn 下为 sendfile 零拷贝）
+        response = send_from_directory(folder, filename, max_age=max_age, conditional=True)
+
+    if fallback:
+        response.cache_control.no_cache = True
+        response.cache_control.max_age = 0
+        return response
+
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def __original_of(filename, folder):
+    stem = filename.split('_', 1)[0].split('.', 1)[0]
+    for extension in ALLOWED_EXTENSIONS:
+        if os.path.isfile(os.path.join(folder, f"{stem}.{extension}")):
+            return f"{stem}.{extension}"
+    return None
+
+
+# 上传图片
 @image_bp.route('/image/upload', methods=['POST'])
 @login_required
 @response_format
 def upload():
-    from app import BASE_DIR
+    # 在解析表单前按 Content-Length 拒绝过大的请求，werkzeug 只会读取声明长度内的字节；
+    # 不限制其他接口（如 /food/import 的流式导入），因此不使用全局 MAX_CONTENT_LENGTH
+    if request.content_length is None:
+        return {"code": constants.RESULT_FAIL, "message": "缺少 Content-Length"}
+    if request.content_length > MAX_FILE_SIZE + MULTIPART_OVERHEAD:
+        return {"code": constants.RESULT_FAIL, "message": "文件大小不能超过 1MB"}
+
     if 'file' not in request.files:
         return {"code": constants.RESULT_FAIL, "message": "没有文件上传"}
 
@@ -29,25 +148,48 @@ def upload():
     if file.filename == '':
         return {"code": constants.RESULT_FAIL, "message": "没有选择文件"}
 
-    # 检查文件大小
-    if request.content_length > MAX_FILE_SIZE:
-        return {"code": constants.RESULT_FAIL, "message": "文件大小不能超过 1MB"}
-
     if not allowed_file(file.filename):
         return {"code": constants.RESULT_FAIL, "message": "不允许的文件类型"}
 
-    # 生成安全的文件名并保存文件
-    filename = secure_filename(file.filename)
-    upload_folder = os.path.join(BASE_DIR, 'static/image')  # 上传目录
+    upload_folder = image_folder()  # 上传目录
     os.makedirs(upload_folder, exist_ok=True)  # 创建目录（如果不存在）
-    file_path = os.path.join(upload_folder, filename)
 
-    file.save(file_path)  # 保存文件
+    # 分块写入临时文件，同时计算 SHA-256 并按实际字节数精确检查文件大小
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    return {"code": constants.RESULT_FAIL, "message": "文件大小不能超过 1MB"}
+                digest.update(chunk)
+                out.write(chunk)
+
+        # 以内容哈希命名，相同内容的图片只存一份
+        extension = file.filename.rsplit('.', 1)[1].lower()
+        filename = f"{digest.hexdigest()}.{extension}"
+        file_path = os.path.join(upload_folder, filename)
+        if not os.path.exists(file_path):
+            # mkstemp 创建的文件权限为 0600，替换前放开读权限
+            os.chmod(tmp_path, IMAGE_FILE_MODE)
+            os.replace(tmp_path, file_path)
+            tmp_path = None
+        # 缩略图和 WebP 在后台任务中生成；原图已存在但缩略图缺失（如上次入队失败）时重新入队
+        if variants_missing(file_path):
+            celery.send_task('tasks.generate_image_variants', args=[file_path])
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
-    # 生成可访问的 URL
-    url = f"/static/image/{filename}"
+    urls = image_urls(filename)
 
     return {
         "code": constants.RESULT_SUCCESS,
-        "url": url
+        "url": urls['original'],
+        "urls": urls
     }
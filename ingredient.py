@@ -1,8 +1,12 @@
 # food.py
 from flask import Blueprint, request, g
 import constants
-from decorators import login_required, response_format
-from models import db, Ingredient
+from decorators import login_required, response_format, cached_response
+from pagination import paginate
+from cache import bump_version
+from search import apply_search
+from models import db, Ingredient, FoodIngredient
+from food_index import sync_food_index
 
 ingredient_bp = Blueprint('ingredient', __name__)
 
@@ -35,6 +39,7 @@ def ingredient_save():
         db.session.add(ingredient)
 
     db.session.commit()
+    bump_version('ingredient')
 
     # 返回成功信息
     return {"code": constants.RESULT_SUCCESS, "ingredient_id": ingredient.id}
@@ -43,23 +48,19 @@ def ingredient_save():
 # 获取所有食物项
 @ingredient_bp.route('/ingredient', methods=['GET'])
 @login_required
+@cached_response('ingredient')
 @response_format
 def get_ingredient():
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
     name = request.args.get('title', '')
 
     # 构建查询
     query = Ingredient.query
 
     if name:
-        query = query.filter(Ingredient.name.ilike(f'%{name}%'))
-    # 获取总记录数
-    total = query.count()
-
-    # 分页查询
-    ingredients = query.offset((page - 1) * page_size).limit(page_size).all()
+        query = apply_search(query, Ingredient.name, name)
+    # 分页查询（传入 after 时使用游标分页）
+    ingredients, total, next_cursor = paginate(query, Ingredient.id)
 
     # 返回数据
     return {
@@ -71,7 +72,8 @@ def get_ingredient():
 
             } for ingredient in ingredients
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
     }
 
 # 删除食物项
@@ -93,8 +95,13 @@ def delete_ingredient():
     else:
         return {"code": constants.RESULT_FAIL, "message": "Insufficient permissions"}
 
+    # 记录受影响的菜，删除后更新可选菜索引
+    food_ids = [row.food_id for row in FoodIngredient.query.with_entities(FoodIngredient.food_id).filter_by(ingredient_id=ingredient.id)]
+
     db.session.delete(ingredient)
     db.session.commit()
+    bump_version('ingredient')
+    sync_food_index(food_ids)
     return {"code": constants.RESULT_SUCCESS, "message": "Ingredient item deleted successfully"}
 
 
@@ -1,8 +1,10 @@
 # food.py
 from flask import Blueprint, request, g
 import constants
-from decorators import login_required, response_format
-from models import db, IntervalSchedule
+from decorators import login_required, response_format, cached_response
+from pagination import paginate
+from cache import bump_version
+from models import db, IntervalSchedule, ScheduledTask
 
 interval_bp = Blueprint('interval', __name__)
 
@@ -33,26 +35,26 @@ def interval_save():
 
     db.session.commit()
 
+    # 使用该调度的任务重新计算下次运行时间
+    for task in ScheduledTask.query.filter_by(interval_id=interval.id, is_active=True):
+        task.refresh_next_run()
+    db.session.commit()
+    bump_version('interval_schedules')
+
     # 返回成功信息
     return {"code": constants.RESULT_SUCCESS, "interval_id": interval.id}
 
 
 @interval_bp.route('/interval', methods=['GET'])
 @login_required
+@cached_response('interval_schedules')
 @response_format
 def get_interval():
-    # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
-
     # 构建查询
     query = IntervalSchedule.query
 
-    # 获取总记录数
-    total = query.count()
-
-    # 分页查询
-    intervals = query.offset((page - 1) * page_size).limit(page_size).all()
+    # 分页查询（传入 after 时使用游标分页）
+    intervals, total, next_cursor = paginate(query, IntervalSchedule.id)
 
     # 返回数据
     return {
@@ -64,7 +66,8 @@ def get_interval():
                 'unit': interval.period
             } for interval in intervals
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
     }
 
 @interval_bp.route('/interval/del', methods=['POST'])
@@ -80,6 +83,7 @@ def delete_interval():
 
     db.session.delete(interval)
     db.session.commit()
+    bump_version('interval_schedules')
     return {"code": constants.RESULT_SUCCESS, "message": "interval item deleted successfully"}
 
 
@@ -1,36 +1,304 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from html.parser import HTMLParser
+from urllib.parse import urlparse
 import requests
 from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # lxml 为可选依赖
+    lxml_html = None
+
+# 解析后端：auto / stream（流式解析，输出与 bs4 相同）、bs4、lxml。
+# lxml 最快，但其闭合嵌套规则、空白折叠和 script 文本处理与 bs4 不同，输出可能不一致，需显式指定
+PARSER_BACKEND = os.getenv('KITCHEN_PARSER', 'auto')
+
+
+class RateLimiter:
+    """按主机限速：同一主机相邻两次请求至少间隔 1/rate 秒，rate 为 0 时不限速"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_at = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_at.get(host, now))
+            self._next_at[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+# 没有结束标签的空元素，不入栈（与 BeautifulSoup 的 html.parser 树构建规则一致）
+VOID_ELEMENTS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem',
+    'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame',
+    'image', 'isindex', 'nextid', 'spacer',
+])
+# 其中的文本不计入 BeautifulSoup 的 tag.text
+NON_TEXT_ELEMENTS = frozenset(['script', 'style', 'template'])
+# 其中的纯空白文本不折叠
+PRESERVE_WHITESPACE_ELEMENTS = frozenset(['pre', 'textarea'])
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+class RecipeParser(HTMLParser):
+    """
+    流式解析器：只提取 p.name 的文本和第一个链接、p.ing.ellipsis 的文本，不构建文档树。
+    用一个标签栈模拟 BeautifulSoup 的嵌套与闭合规则，输出与 parse_bs4 相同
+    """
 
-class Kitchen:
     def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.names = []  # [(菜名, 链接), ...]
+        self.ings = []  # [食材, ...]
+        self._stack = []  # 未闭合的元素：(标签, 目标记录或 None)
+        self._open = []  # 未闭合的目标记录
+        self._data = []  # 两个标签之间的文本，遇到下一个标签时作为一个字符串处理
+        self._closed_void = []  # 已自动闭合的空元素，其后多余的结束标签（如 </br>）被忽略
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        attrs = dict(attrs)
+        if tag == 'a':
+            # 与 tag.find('a') 一致：取每个 p.name 内的第一个 a
+            for record in self._open:
+                if record['name'] is not None and not record['has_a']:
+                    record['has_a'] = True
+                    record['href'] = attrs.get('href')
+
+        record = None
+        if tag == 'p':
+            # 与 BeautifulSoup 的 class_ 匹配规则一致：class 含 name；或 class 各项以单个空格连接后为 "ing ellipsis"
+            classes = (attrs.get('class') or '').split()
+            is_name = 'name' in classes
+            is_ing = ' '.join(classes) == 'ing ellipsis'
+            if is_name or is_ing:
+                # 开始时占位，结果按开始标签的文档顺序排列，与 find_all 一致
+                record = {'name': None, 'ing': None, 'text': [], 'href': None, 'has_a': False}
+                if is_name:
+                    record['name'] = len(self.names)
+                    self.names.append(None)
+                if is_ing:
+                    record['ing'] = len(self.ings)
+                    self.ings.append(None)
+                self._open.append(record)
+
+        if tag in VOID_ELEMENTS:
+            self._closed_void.append(tag)
+        else:
+            self._stack.append((tag, record))
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)
+            return
+        self._flush()
+        # 闭合最近的同名元素及其内部未闭合的元素，没有同名元素时忽略
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                break
+        else:
+            return
+        popped = self._stack[index:]
+        del self._stack[index:]
+        for _, record in reversed(popped):
+            if record is not None:
+                self._finish(record)
+
+    def handle_data(self, data):
+        if self._open:
+            self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+
+    def _flush(self):
+        if not self._data:
+            return
+        text = ''.join(self._data)
+        self._data = []
+        tags = {tag for tag, _ in self._stack}
+        if tags & NON_TEXT_ELEMENTS:
+            return
+        # 与 BeautifulSoup 一致：纯空白的字符串折叠为一个换行或空格
+        if not text.strip(ASCII_SPACES) and not tags & PRESERVE_WHITESPACE_ELEMENTS:
+            text = '\n' if '\n' in text else ' '
+        for record in self._open:
+            record['text'].append(text)
+
+    def close(self):
+        # 文档结束时仍未闭合的元素视为在末尾闭合（BeautifulSoup 同样保留它们）
+        super().close()
+        self._flush()
+        while self._stack:
+            _, record = self._stack.pop()
+            if record is not None:
+                self._finish(record)
+
+    def _finish(self, record):
+        text = ''.join(record['text'])
+        if record['name'] is not None:
+            self.names[record['name']] = (text, record['href'])
+        if record['ing'] is not None:
+            self.ings[record['ing']] = text
+        self._open.remove(record)
+
+
+def parse_stream(html):
+    parser = RecipeParser()
+    parser.feed(html)
+    parser.close()
+    return parser.names, parser.ings
+
+
+def parse_bs4(html):
+    bs_foods = BeautifulSoup(html, 'html.parser')
+    tag_name = bs_foods.find_all('p', class_='name')
+    tag_procedure = bs_foods.find_all('p', class_='ing ellipsis')
+    return [(tag.text, tag.find('a')['href']) for tag in tag_name], [tag.text for tag in tag_procedure]
+
+
+def parse_lxml(html):
+    tree = lxml_html.fromstring(html)
+    tag_name = tree.xpath("//p[contains(concat(' ', normalize-space(@class), ' '), ' name ')]")
+    tag_procedure = tree.xpath("//p[normalize-space(@class)='ing ellipsis']")
+    return [(tag.text_content(), tag.xpath('.//a/@href')[0]) for tag in tag_name], [tag.text_content() for tag in tag_procedure]
+
+
+PARSERS = {
+    'stream': parse_stream,
+    'bs4': parse_bs4,
+    'lxml': parse_lxml,
+}
+
+
+def select_parser(backend=None):
+    # 运行时选择解析后端，指定的后端不可用时退回流式解析
+    backend = backend or PARSER_BACKEND
+    if backend == 'auto':
+        backend = 'stream'
+    if backend == 'lxml' and lxml_html is None:
+        backend = 'stream'
+    return PARSERS.get(backend, parse_stream)
+
+
+class Kitchen:
+    def __init__(self, concurrency=4, rate=2, timeout=(5, 15), validators=None, parser=None):
         self.url = "https://www.xiachufang.com/explore/?page={}"
         self.ua = UserAgent()
         self.headers = {
             "User-Agent": 'Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.108 Safari/537.36'
         }
+        self.concurrency = concurrency
+        self.timeout = timeout  # 连接超时、读取超时（秒）
+        self.limiter = RateLimiter(rate)
+        # 条件请求的校验信息：url -> {'etag': ..., 'last_modified': ...}
+        self.validators = validators if validators is not None else {}
+        # 已抓取、尚未保存成功的页的校验信息，由 confirm_page 转入 validators
+        self.pending_validators = {}
+        self.session = self._build_session()
+        self.parse = select_parser(parser)
+
+    def _build_session(self):
+        # 复用连接池，对连接错误、429、5xx 按指数退避重试
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=self.concurrency, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
 
     def get_page(self, url):
+        # 页面未变化（304）或请求失败时返回 None
+        headers = dict(self.headers)
+        validator = self.validators.get(url) or {}
+        if validator.get('etag'):
+            headers['If-None-Match'] = validator['etag']
+        if validator.get('last_modified'):
+            headers['If-Modified-Since'] = validator['last_modified']
+
         try:
-            res = requests.get(url=url, headers=self.headers)
+            self.limiter.wait(urlparse(url).netloc)
+            res = self.session.get(url=url, headers=headers, timeout=self.timeout)
+            if res.status_code == 304:
+                return None
             res.raise_for_status()
+
+            etag, last_modified = res.headers.get('ETag'), res.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.pending_validators[url] = {'etag': etag, 'last_modified': last_modified}
             return res.text
         except requests.exceptions.RequestException as e:
             print(f"请求出错: {e}")
             return None
 
+    def confirm_page(self, page):
+        """页面保存成功后启用其校验信息，返回 (url, 校验信息)；保存失败的页下次仍会完整抓取"""
+        url = self.url.format(page)
+        validator = self.pending_validators.pop(url, None)
+        if validator:
+            self.validators[url] = validator
+        return url, validator
+
+    def crawl(self, pages):
+        """
+        并发抓取多页，按完成顺序逐页产出 (page, recipes)；未变化或失败的页 recipes 为 None。
+        同时在途的页数不超过并发数的两倍，页码范围再大也不会一次性提交全部任务
+        """
+        pages = iter(pages)
+        window = self.concurrency * 2
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = {}
+            while True:
+                for page in pages:
+                    pending[executor.submit(self.get_page, self.url.format(page))] = page
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    return
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = pending.pop(future)
+                    html = future.result()
+                    yield page, self.parse_page(html) if html else None
+
     def parse_page(self, html):
-        bs_foods = BeautifulSoup(html, 'html.parser')
-        tag_name = bs_foods.find_all('p', class_='name')
-        tag_procedure = bs_foods.find_all('p', class_='ing ellipsis')
+        tag_name, tag_procedure = self.parse(html)
 
         list_all = []
 
         for x in range(len(tag_name)):
-            recipe_name = tag_name[x].text.strip()
-            recipe_link = 'https://www.xiachufang.com'+ tag_name[x].find('a')['href']
-            ingredients = tag_procedure[x].text.strip() if x < len(tag_procedure) else "无食材"
+            recipe_name = tag_name[x][0].strip()
+            recipe_link = 'https://www.xiachufang.com'+ tag_name[x][1]
+            ingredients = tag_procedure[x].strip() if x < len(tag_procedure) else "无食材"
 
             list_all.append([recipe_name, recipe_link, ingredients])
 
-        return list_all
\ No newline at end of file
+        return list_all
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, current_app
 import constants
 from decorators import login_required, response_format, admin_required
-from models import User, Food
+from models import db, User, Food, FoodIngredient, Ingredient
+from food_index import random_eligible
 from sms import send_message
 from weather import Weather
 import random
@@ -35,56 +36,46 @@ def msg_send():
         return {"code": constants.RESULT_FAIL, "message": str(e)}
 
 
-# @msg_bp.route('/msg/all', methods=['POST'])
-# @login_required
-# @admin_required
-# @response_format
-def msg_send_all():
-    try:
-        # 获取所有食物和其对应的食材信息
-        message = ''  # 初始化消息字符串
-        foods_name = get_today_food()
-        if foods_name and isinstance(foods_name,list) and len(foods_name) > 0:
-            pass
+def build_menu_message():
+    # 随机选菜并组装今日菜单消息，没有可选的菜时返回 None
+    message = ''  # 初始化消息字符串
+    food_ids = get_today_food()
+    if not food_ids:
+        return None
+
+    # 一次关联查询取出菜名和所需材料
+    rows = db.session.query(Food.id, Food.name.label('food_name'), Ingredient.name.label('ingredient_name')) \
+        .outerjoin(FoodIngredient, FoodIngredient.food_id == Food.id) \
+        .outerjoin(Ingredient, Ingredient.id == FoodIngredient.ingredient_id) \
+        .filter(Food.id.in_(food_ids)) \
+        .order_by(Food.id, FoodIngredient.id) \
+        .all()
+
+    foods = {}
+    for row in rows:
+        food = foods.setdefault(row.id, {'name': row.food_name, 'ingredients': []})
+        if row.ingredient_name:
+            food['ingredients'].append(row.ingredient_name)
+
+    for food in foods.values():
+        # 将菜名和食材格式化为字符串
+        if food['ingredients']:
+            ingredient_list = ', '.join(food['ingredients'])  # 连接食材为字符串
+            message += f"{food['name']}: {ingredient_list}\n"  # 组装消息
         else:
-            return {"code": constants.RESULT_FAIL, "message": "没有菜"}
-
-        foods = Food.query.filter(Food.name.in_(foods_name)).all()  # 筛选与 foods_name 匹配的菜名
-
-        for food in foods:
-            # 获取菜名
-            food_name = food.name
-
-            # 获取所需材料
-            ingredient_names = [ingredient.ingredient.name for ingredient in food.ingredient]
-
-            # 将菜名和食材格式化为字符串
-            if ingredient_names:
-                ingredient_list = ', '.join(ingredient_names)  # 连接食材为字符串
-                message += f"{food_name}: {ingredient_list}\n"  # 组装消息
-            else:
-                message += f"{food_name}: (无材料)\n"  # 如果没有材料
-        # 获取所有用户
-        user_qs = User.query.filter(User.device_key.isnot(None), User.device_key != '').all()
-        if user_qs:
-            for user in user_qs:
-                send_message(user.device_key, message, '今日菜单')  # 发送消息给用户
-
-            return {"code": constants.RESULT_SUCCESS}
-        else:
-            return {"code": constants.RESULT_FAIL, "message": "用户不存在"}
+            message += f"{food['name']}: (无材料)\n"  # 如果没有材料
+    return message
 
-    except Exception as e:
-        logger.error("========msg_send_all_error")
-        logger.error(e)
-        return {"code": constants.RESULT_FAIL, "message": str(e)}
 
+def get_push_device_keys():
+    # 获取所有绑定了 bark 编码的用户设备
+    rows = User.query.with_entities(User.device_key).filter(User.device_key.isnot(None), User.device_key != '').all()
+    return [row.device_key for row in rows]
 
-def get_today_food():
-    foods_with_ingredients = Food.query.filter(Food.ingredient.any()).all()
-    food_names = [food.name for food in foods_with_ingredients]
 
-    return random.sample(food_names, min(len(food_names), 2))
+def get_today_food():
+    # 从有食材的菜的 id 索引中随机取两道，开销与菜谱总量无关
+    return random_eligible(2)
 
     # weather_api = Weather()  # 创建 Weather 类的实例
     # weather_data = weather_api.get_weather()  # 通过实例调用 get_weather 方法
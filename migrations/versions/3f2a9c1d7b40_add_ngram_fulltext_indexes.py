@@ -0,0 +1,35 @@
+"""add ngram fulltext indexes for name search
+
+Revision ID: 3f2a9c1d7b40
+Revises: 
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b40'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+FULLTEXT_INDEXES = [
+    ('ft_food_name', 'food', 'name'),
+    ('ft_ingredient_name', 'ingredient', 'name'),
+    ('ft_cate_name', 'cate', 'name'),
+    ('ft_events_name', 'events', 'name'),
+    ('ft_users_username', 'users', 'username'),
+]
+
+
+def upgrade():
+    for name, table, column in FULLTEXT_INDEXES:
+        op.create_index(name, table, [column], mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade():
+    for name, table, column in reversed(FULLTEXT_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,55 @@
+"""add lookup indexes and association unique constraints
+
+Revision ID: 7c41e9a2d5b8
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c41e9a2d5b8'
+down_revision = '3f2a9c1d7b40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 按名称查找：爬虫去重、批量解析食材、每日菜单
+    op.create_index('ix_food_name', 'food', ['name'])
+    op.create_index('ix_ingredient_name', 'ingredient', ['name'])
+    op.create_index('ix_scheduled_tasks_name', 'scheduled_tasks', ['name'])
+
+    # 事件：按用户列表/倒计时，按日期查找提醒
+    op.create_index('ix_events_user_id_target_date', 'events', ['user_id', 'target_date'])
+    op.create_index('ix_events_target_date', 'events', ['target_date'])
+
+    # 关联表：先清理重复行，再加唯一约束；反向查询走 (cate_id) / (ingredient_id, food_id)
+    op.execute(
+        "DELETE t1 FROM food_cate t1 JOIN food_cate t2 "
+        "ON t1.food_id = t2.food_id AND t1.cate_id = t2.cate_id AND t1.id > t2.id"
+    )
+    op.execute(
+        "DELETE t1 FROM food_ingredient t1 JOIN food_ingredient t2 "
+        "ON t1.food_id = t2.food_id AND t1.ingredient_id = t2.ingredient_id AND t1.id > t2.id"
+    )
+    op.create_unique_constraint('uq_food_cate_food_id_cate_id', 'food_cate', ['food_id', 'cate_id'])
+    op.create_index('ix_food_cate_cate_id', 'food_cate', ['cate_id'])
+    op.create_unique_constraint('uq_food_ingredient_food_id_ingredient_id', 'food_ingredient', ['food_id', 'ingredient_id'])
+    op.create_index('ix_food_ingredient_ingredient_id_food_id', 'food_ingredient', ['ingredient_id', 'food_id'])
+
+
+def downgrade():
+    op.drop_index('ix_food_ingredient_ingredient_id_food_id', table_name='food_ingredient')
+    op.drop_constraint('uq_food_ingredient_food_id_ingredient_id', 'food_ingredient', type_='unique')
+    op.drop_index('ix_food_cate_cate_id', table_name='food_cate')
+    op.drop_constraint('uq_food_cate_food_id_cate_id', 'food_cate', type_='unique')
+
+    op.drop_index('ix_events_target_date', table_name='events')
+    op.drop_index('ix_events_user_id_target_date', table_name='events')
+
+    op.drop_index('ix_scheduled_tasks_name', table_name='scheduled_tasks')
+    op.drop_index('ix_ingredient_name', table_name='ingredient')
+    op.drop_index('ix_food_name', table_name='food')
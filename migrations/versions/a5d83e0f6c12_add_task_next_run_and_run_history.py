@@ -0,0 +1,44 @@
+"""add scheduled task next_run_at and task run history
+
+Revision ID: a5d83e0f6c12
+Revises: 7c41e9a2d5b8
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d83e0f6c12'
+down_revision = '7c41e9a2d5b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 下次运行时间：到期任务按 (is_active, next_run_at) 范围查询
+    op.add_column('scheduled_tasks', sa.Column('next_run_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_scheduled_tasks_is_active_next_run_at', 'scheduled_tasks', ['is_active', 'next_run_at'])
+
+    # 任务运行记录：按周期任务查询最近的运行
+    op.create_table(
+        'task_runs',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('scheduled_task_id', sa.Integer(), nullable=True),
+        sa.Column('task_name', sa.String(length=100), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_ms', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_task_runs_scheduled_task_id_started_at', 'task_runs', ['scheduled_task_id', 'started_at'])
+
+
+def downgrade():
+    op.drop_index('ix_task_runs_scheduled_task_id_started_at', table_name='task_runs')
+    op.drop_table('task_runs')
+
+    op.drop_index('ix_scheduled_tasks_is_active_next_run_at', table_name='scheduled_tasks')
+    op.drop_column('scheduled_tasks', 'next_run_at')
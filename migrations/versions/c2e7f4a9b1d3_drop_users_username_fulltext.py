@@ -0,0 +1,25 @@
+"""drop the ngram fulltext index on users.username
+
+Revision ID: c2e7f4a9b1d3
+Revises: a5d83e0f6c12
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e7f4a9b1d3'
+down_revision = 'a5d83e0f6c12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 用户名多为英文，ngram 分词受 InnoDB 英文停用词影响，用户搜索改回 LIKE，不再需要该索引
+    op.drop_index('ft_users_username', table_name='users')
+
+
+def downgrade():
+    op.create_index('ft_users_username', 'users', ['username'], mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
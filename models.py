@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from celery import schedules
 from extensions import db
 
@@ -22,6 +23,11 @@ class User(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'  # 表名
+    __table_args__ = (
+        db.Index('ft_events_name', 'name', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+        db.Index('ix_events_user_id_target_date', 'user_id', 'target_date'),
+        db.Index('ix_events_target_date', 'target_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True,autoincrement=True)
     name = db.Column(db.String(120), nullable=False, info={"description": "事件名称"})
@@ -34,12 +40,17 @@ class Event(db.Model):
 
 class ScheduledTask(db.Model):
     __tablename__ = 'scheduled_tasks'  # 表名
+    __table_args__ = (
+        db.Index('ix_scheduled_tasks_name', 'name'),
+        db.Index('ix_scheduled_tasks_is_active_next_run_at', 'is_active', 'next_run_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)  # 主键
     name = db.Column(db.String(100), nullable=False, info={"description": "任务名称"})
     task_type = db.Column(db.String(100), nullable=False, info={"description": "任务函数名"})
     frequency = db.Column(db.String(50), nullable=True, info={"description": "调度频率"})
     last_run = db.Column(db.DateTime, default=datetime.utcnow, info={"description": "上次运行时间"})
+    next_run_at = db.Column(db.DateTime, nullable=True, info={"description": "下次运行时间（UTC）"})
     is_active = db.Column(db.Boolean, default=True, info={"description": "是否激活（False: 不激活, True: 激活）"})
     created_at = db.Column(db.DateTime, default=datetime.utcnow, info={"description": "任务创建时间"})
     is_periodic = db.Column(db.Boolean, default=False, info={"description": "是否为周期任务"})
@@ -51,6 +62,46 @@ class ScheduledTask(db.Model):
     def __repr__(self):
         return f"<ScheduledTask(name={self.name}, task_type={self.task_type}, frequency={self.frequency})>"
 
+    def get_schedule(self):
+        # 当前调度方式对应的 Celery 调度对象，配置无效时返回 None
+        if self.schedule_type == 'crontab' and self.crontab_id:
+            item = db.session.get(CrontabSchedule, self.crontab_id)
+        elif self.schedule_type == 'interval' and self.interval_id:
+            item = db.session.get(IntervalSchedule, self.interval_id)
+        else:
+            item = None
+        return item.schedule if item else None
+
+    def refresh_next_run(self, last_run_at=None):
+        # 重新计算下次运行时间，暂停或调度无效的任务置空
+        schedule = self.get_schedule() if self.is_active else None
+        self.next_run_at = next_run_time(schedule, last_run_at) if schedule else None
+
+
+def next_run_time(schedule, last_run_at=None):
+    # 按 Celery 调度对象计算下次运行时间，转换为与其他时间字段一致的 UTC 无时区时间
+    now = schedule.now()
+    run_at = now + schedule.remaining_estimate(last_run_at or now)
+    return run_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class TaskRun(db.Model):
+    __tablename__ = 'task_runs'  # 表名
+    __table_args__ = (
+        db.Index('ix_task_runs_scheduled_task_id_started_at', 'scheduled_task_id', 'started_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)  # 主键
+    scheduled_task_id = db.Column(db.Integer, nullable=True, info={"description": "周期任务ID（非周期任务为空）"})
+    task_name = db.Column(db.String(100), nullable=False, info={"description": "任务函数名"})
+    started_at = db.Column(db.DateTime, nullable=False, info={"description": "开始时间（UTC）"})
+    duration_ms = db.Column(db.Integer, nullable=False, info={"description": "耗时（毫秒）"})
+    status = db.Column(db.String(16), nullable=False, info={"description": "结束状态（SUCCESS, FAILURE, RETRY）"})
+    worker = db.Column(db.String(100), nullable=True, info={"description": "执行的 worker"})
+
+    def __repr__(self):
+        return f"<TaskRun(task_name={self.task_name}, status={self.status}, duration_ms={self.duration_ms})>"
+
 class CrontabSchedule(db.Model):
     __tablename__ = 'crontab_schedules'  # 表名
 
@@ -66,16 +117,26 @@ class CrontabSchedule(db.Model):
             self.minute, self.hour, self.day_of_week, self.day_of_month, self.month_of_year,
         )
 
+    @property
+    def expression(self):
+        # 5 段表达式：分 时 日 月 星期
+        return f"{self.minute} {self.hour} {self.day_of_month} {self.month_of_year} {self.day_of_week}"
+
     @property
     def schedule(self):
-        # 返回调度对象，用于 Celery 任务调度
-        return schedules.crontab(
-            minute=self.minute,
-            hour=self.hour,
-            day_of_week=self.day_of_week,
-            day_of_month=self.day_of_month,
-            month_of_year=self.month_of_year
-        )
+        # 返回调度对象，用于 Celery 任务调度；相同字段复用同一个对象
+        return _crontab(self.minute, self.hour, self.day_of_week, self.day_of_month, self.month_of_year)
+
+
+@lru_cache(maxsize=256)
+def _crontab(minute, hour, day_of_week, day_of_month, month_of_year):
+    return schedules.crontab(
+        minute=minute,
+        hour=hour,
+        day_of_week=day_of_week,
+        day_of_month=day_of_month,
+        month_of_year=month_of_year
+    )
 
 class IntervalSchedule(db.Model):
     __tablename__ = 'interval_schedules'  # 表名
@@ -107,6 +168,10 @@ from extensions import db
 
 class Food(db.Model):
     __tablename__ = 'food'  # 表名
+    __table_args__ = (
+        db.Index('ft_food_name', 'name', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+        db.Index('ix_food_name', 'name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True,autoincrement=True)  # 主键ID
     name = db.Column(db.String(100), nullable=False, info={"description": "菜名"})  # 菜名
@@ -143,6 +208,9 @@ class Image(db.Model):
 
 class Cate(db.Model):
     __tablename__ = 'cate'  # 表名
+    __table_args__ = (
+        db.Index('ft_cate_name', 'name', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
 
     id = db.Column(db.Integer, primary_key=True,autoincrement=True)
     name = db.Column(db.String(100), nullable=False, info={"description": "分类名称"})
@@ -159,6 +227,10 @@ class Cate(db.Model):
 
 class Ingredient(db.Model):
     __tablename__ = 'ingredient'  # 表名
+    __table_args__ = (
+        db.Index('ft_ingredient_name', 'name', mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+        db.Index('ix_ingredient_name', 'name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True,autoincrement=True)
     name = db.Column(db.String(100), nullable=False, info={"description": "食材名称"})
@@ -176,6 +248,10 @@ class Ingredient(db.Model):
 
 class FoodCate(db.Model):
     __tablename__ = 'food_cate'
+    __table_args__ = (
+        db.UniqueConstraint('food_id', 'cate_id', name='uq_food_cate_food_id_cate_id'),
+        db.Index('ix_food_cate_cate_id', 'cate_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     food_id = db.Column(db.Integer, db.ForeignKey('food.id'), nullable=False)
@@ -188,6 +264,10 @@ class FoodCate(db.Model):
 
 class FoodIngredient(db.Model):
     __tablename__ = 'food_ingredient'
+    __table_args__ = (
+        db.UniqueConstraint('food_id', 'ingredient_id', name='uq_food_ingredient_food_id_ingredient_id'),
+        db.Index('ix_food_ingredient_ingredient_id_food_id', 'ingredient_id', 'food_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     food_id = db.Column(db.Integer, db.ForeignKey('food.id'), nullable=False)
@@ -0,0 +1,93 @@
+# pagination.py
+import base64
+import hashlib
+import json
+from flask import request
+from sqlalchemy import func
+from extensions import db
+from services import redis_client
+
+# 游标模式下总数的缓存时间（秒）
+TOTAL_CACHE_TTL = 60
+
+
+def encode_cursor(value):
+    # 将最后一条记录的排序键编码为不透明的游标
+    raw = json.dumps({"k": value}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(token):
+    # 解析游标，非法游标视为从第一页开始
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token.encode('ascii'))
+        return json.loads(raw).get('k')
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def count_query(query):
+    # 总数查询：去掉排序后按子查询计数
+    return db.session.query(func.count()).select_from(query.order_by(None).subquery())
+
+
+def offset_query(query, page, page_size):
+    # 偏移分页的数据查询
+    return query.offset((page - 1) * page_size).limit(page_size)
+
+
+def cursor_query(query, column, last_key, page_size):
+    # 游标分页的数据查询：固定按 column 排序（会覆盖搜索的相关度排序），多取一条用于判断是否还有下一页
+    query = query.order_by(None).order_by(column)
+    if last_key is not None:
+        query = query.filter(column > last_key)
+    return query.limit(page_size + 1)
+
+
+def cached_count(query):
+    # 总数按查询语句缓存，避免每次翻页都做全表 count
+    try:
+        sql = str(query.statement.compile(compile_kwargs={"literal_binds": True}))
+    except Exception:
+        return count_query(query).scalar()
+
+    key = f"count:{hashlib.sha1(sql.encode('utf-8')).hexdigest()}"
+    total = redis_client.get(key)
+    if total is not None:
+        return int(total)
+
+    total = count_query(query).scalar()
+    redis_client.setex(key, TOTAL_CACHE_TTL, total)
+    return total
+
+
+def paginate(query, column):
+    """
+    分页查询，返回 (数据列表, 总数, 下一页游标)
+
+    传入 after 参数时使用游标分页：按 column 排序并从上一页最后一条记录之后开始查询，
+    深分页与第一页开销相同；此时只有传入 withTotal=1 才返回（缓存的）总数。
+    未传入 after 时沿用 page/pageSize 的偏移分页。
+    """
+    page_size = request.args.get('pageSize', 10, type=int)
+    after = request.args.get('after')
+
+    if after is None:
+        page = request.args.get('page', 1, type=int)
+        total = count_query(query).scalar()
+        items = offset_query(query, page, page_size).all()
+        return items, total, None
+
+    total = None
+    if request.args.get('withTotal', 0, type=int):
+        total = cached_count(query)
+
+    rows = cursor_query(query, column, decode_cursor(after), page_size).all()
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor(getattr(items[-1], column.key))
+
+    return items, total, next_cursor
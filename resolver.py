@@ -0,0 +1,41 @@
+# resolver.py
+from sqlalchemy import insert
+from models import db
+
+BATCH_SIZE = 500  # 单条 IN 查询 / 批量插入的最大条数
+
+
+class NameResolver:
+    """
+    按名称批量解析记录 ID：已存在的名称用一次 IN 查询取回，缺失的名称一次批量插入。
+    同一实例内缓存 名称 -> ID，适合在一次爬取/导入过程中跨页复用。
+    """
+
+    def __init__(self, model, user_id=1):
+        self.model = model
+        self.user_id = user_id
+        self.memo = {}
+
+    def resolve(self, names):
+        names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+        missing = [name for name in names if name not in self.memo]
+        if missing:
+            self._load(missing)
+
+            new_names = [name for name in missing if name not in self.memo]
+            for i in range(0, len(new_names), BATCH_SIZE):
+                db.session.execute(insert(self.model), [
+                    {'name': name, 'user_id': self.user_id} for name in new_names[i:i + BATCH_SIZE]
+                ])
+            if new_names:
+                self._load(new_names)
+
+        return {name: self.memo[name] for name in names if name in self.memo}
+
+    def _load(self, names):
+        model = self.model
+        for i in range(0, len(names), BATCH_SIZE):
+            rows = db.session.query(model.name, model.id).filter(model.name.in_(names[i:i + BATCH_SIZE])).all()
+            for name, record_id in rows:
+                self.memo.setdefault(name, record_id)
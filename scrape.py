@@ -1,68 +1,179 @@
+import json
+import os
+import uuid
 from flask import Blueprint, request
+from sqlalchemy import insert
 import constants
 from models import Food, db, Ingredient, FoodIngredient
 from decorators import login_required, response_format
 from kitchen import Kitchen
+from food_index import sync_food_index
+from resolver import NameResolver
+from services import redis_client
+from cache import bump_version
+from extensions import celery
 
 scrape_bp = Blueprint('scrape', __name__)
 
+SCRAPE_CONCURRENCY = int(os.getenv('SCRAPE_CONCURRENCY', 4))  # 默认并发抓取的页数
+SCRAPE_MAX_CONCURRENCY = 8
+SCRAPE_MAX_PAGES = int(os.getenv('SCRAPE_MAX_PAGES', 200))  # 单个任务最多爬取的页数
+SCRAPE_RATE = float(os.getenv('SCRAPE_RATE', 2))  # 每秒对同一主机的最大请求数
+VALIDATORS_KEY = 'scrape:validators'  # 各页的 ETag / Last-Modified
+JOB_TTL = 86400  # 爬取任务进度的保留时间（秒）
+JOB_COUNTERS = ('pages_total', 'pages_done', 'unchanged', 'inserted', 'skipped')
 
-@scrape_bp.route('/scrape', methods=['GET'])
+
+@scrape_bp.route('/scrape', methods=['POST'])
 @login_required
 @response_format
 def scrape_recipes():
-    kitchen = Kitchen()
-
-    page = request.args.get('page', 1, type=int)
-
-    html = kitchen.get_page(kitchen.url.format(page))
-    if html:
-        recipes = kitchen.parse_page(html)
-        for recipe in recipes:
-            new_food = Food(
-                name=recipe[0],
-                procedure=recipe[1],
-                user_id=1,
-            )
-            save_food(new_food, recipe)
-            handel_foods(new_food, recipe[2])
-
-    db.session.commit()  # 提交所有变更
-    return {"code": constants.RESULT_SUCCESS, "message": "数据爬取完成！"}
-
-def save_food(new_food, recipe):
-    existing_food = Food.query.filter_by(name=recipe[0]).first()
-    if existing_food:
-        print(f"菜名 '{recipe[0]}' 已存在，跳过...")
-        return
-
-    db.session.add(new_food)
-
-
-def handel_foods(new_food, ingredients):
-    ingredients_list = ingredients.split('、')
-
-    if ingredients_list and len(ingredients_list) > 1:
-        for ingredient_name in ingredients_list:
-            ingredient_name = ingredient_name.strip()
-            existing_ingredient = Ingredient.query.filter_by(name=ingredient_name).first()
-
-            if existing_ingredient:
-                ingredient_id = existing_ingredient.id
-                print(f"食材 '{ingredient_name}' 已存在，ID 为 {ingredient_id}")
-            else:
-                new_ingredient = Ingredient(
-                    name=ingredient_name,
-                    user_id=1
-                )
-                db.session.add(new_ingredient)
-                # 提交以获取 ID
-                db.session.commit()
-                ingredient_id = new_ingredient.id
-                print(f"创建新的食材 '{ingredient_name}'，ID 为 {ingredient_id}")
-
-            food_ingredient = FoodIngredient(
-                food_id=new_food.id,
-                ingredient_id=ingredient_id
-            )
-            db.session.add(food_ingredient)
\ No newline at end of file
+    # 提交后台爬取任务，支持 page 单页，或 start/end 页码范围
+    data = request.get_json(silent=True) or {}
+    try:
+        start = int(data.get('start') or data.get('page') or 1)
+        end = int(data.get('end') or start)
+        concurrency = int(data.get('concurrency') or SCRAPE_CONCURRENCY)
+    except (TypeError, ValueError):
+        return {"code": constants.RESULT_FAIL, "message": "页码和并发数必须是整数"}
+
+    if start < 1 or end < start:
+        return {"code": constants.RESULT_FAIL, "message": "页码范围无效"}
+    if end - start + 1 > SCRAPE_MAX_PAGES:
+        return {"code": constants.RESULT_FAIL, "message": f"单次最多爬取 {SCRAPE_MAX_PAGES} 页"}
+    if concurrency < 1:
+        return {"code": constants.RESULT_FAIL, "message": "并发数无效"}
+    concurrency = min(concurrency, SCRAPE_MAX_CONCURRENCY)
+
+    job_id = uuid.uuid4().hex
+    key = job_key(job_id)
+    pipe = redis_client.pipeline()
+    pipe.hset(key, mapping={
+        'status': 'pending',
+        'start': start,
+        'end': end,
+        'pages_total': end - start + 1,
+        'pages_done': 0,
+        'unchanged': 0,
+        'inserted': 0,
+        'skipped': 0,
+    })
+    pipe.expire(key, JOB_TTL)
+    pipe.execute()
+
+    celery.send_task('tasks.scrape_job', args=[job_id, start, end, concurrency])
+
+    return {"code": constants.RESULT_SUCCESS, "job_id": job_id}
+
+
+@scrape_bp.route('/scrape/<job_id>', methods=['GET'])
+@login_required
+@response_format
+def scrape_progress(job_id):
+    job = redis_client.hgetall(job_key(job_id))
+    if not job:
+        return {"code": constants.RESULT_FAIL, "message": "任务不存在"}
+
+    data = {field.decode('utf-8'): value.decode('utf-8') for field, value in job.items()}
+    for field in JOB_COUNTERS:
+        if field in data:
+            data[field] = int(data[field])
+    return {"code": constants.RESULT_SUCCESS, "data": data}
+
+
+def job_key(job_id):
+    return f"scrape:job:{job_id}"
+
+
+def update_job(job_id, **fields):
+    redis_client.hset(job_key(job_id), mapping=fields)
+
+
+def crawl_pages(start, end, concurrency=SCRAPE_CONCURRENCY, job_id=None):
+    """并发抓取 start..end 页，每页解析完成后立即写库，返回统计信息；传入 job_id 时逐页更新任务进度"""
+    concurrency = max(1, min(concurrency, SCRAPE_MAX_CONCURRENCY))
+    kitchen = Kitchen(concurrency=concurrency, rate=SCRAPE_RATE, validators=load_validators())
+    resolver = NameResolver(Ingredient)
+
+    stats = {"pages": 0, "unchanged": 0, "inserted": 0, "skipped": 0}
+    for page, recipes in kitchen.crawl(range(start, end + 1)):
+        inserted, skipped, unchanged = 0, 0, 0
+        if recipes is None:
+            unchanged = 1
+        else:
+            inserted, skipped = save_recipes(recipes, resolver)
+            # 只有成功保存的页才记录 ETag / Last-Modified，否则之后的 304 会让该页永远不再入库
+            url, validator = kitchen.confirm_page(page)
+            if validator:
+                save_validators({url: validator})
+
+        stats["pages"] += 1
+        stats["unchanged"] += unchanged
+        stats["inserted"] += inserted
+        stats["skipped"] += skipped
+
+        if job_id:
+            pipe = redis_client.pipeline()
+            pipe.hincrby(job_key(job_id), 'pages_done', 1)
+            pipe.hincrby(job_key(job_id), 'unchanged', unchanged)
+            pipe.hincrby(job_key(job_id), 'inserted', inserted)
+            pipe.hincrby(job_key(job_id), 'skipped', skipped)
+            pipe.execute()
+
+    return stats
+
+
+def load_validators():
+    return {url.decode('utf-8'): json.loads(value) for url, value in redis_client.hgetall(VALIDATORS_KEY).items()}
+
+
+def save_validators(validators):
+    if validators:
+        redis_client.hset(VALIDATORS_KEY, mapping={url: json.dumps(value) for url, value in validators.items()})
+
+
+def save_recipes(recipes, resolver, user_id=1):
+    """批量保存一页菜谱：一次查询过滤已存在的菜名，食材批量解析，一个事务提交，返回 (新增数, 跳过数)"""
+    # 页内按菜名去重
+    unique = {}
+    for recipe in recipes:
+        unique.setdefault(recipe[0], recipe)
+
+    existing = {row[0] for row in db.session.query(Food.name).filter(Food.name.in_(list(unique))).all()}
+    new_recipes = [recipe for name, recipe in unique.items() if name not in existing]
+    skipped = len(recipes) - len(new_recipes)
+    if not new_recipes:
+        return 0, skipped
+
+    try:
+        ingredients = {recipe[0]: split_ingredients(recipe[2]) for recipe in new_recipes}
+        ingredient_ids = resolver.resolve(name for names in ingredients.values() for name in names)
+
+        new_foods = [Food(name=recipe[0], procedure=recipe[1], user_id=user_id) for recipe in new_recipes]
+        db.session.add_all(new_foods)
+        db.session.flush()  # 获取新菜的 ID
+
+        rows = [
+            {'food_id': food.id, 'ingredient_id': ingredient_ids[name]}
+            for food in new_foods for name in ingredients[food.name] if name in ingredient_ids
+        ]
+        if rows:
+            db.session.execute(insert(FoodIngredient), rows)
+        db.session.commit()  # 提交所有变更
+    except Exception:
+        db.session.rollback()
+        # 回滚后缓存的新食材 ID 已失效
+        resolver.memo.clear()
+        raise
+
+    sync_food_index([food.id for food in new_foods])
+    bump_version('food', 'ingredient')
+    return len(new_foods), skipped
+
+
+def split_ingredients(ingredients):
+    # 只有一项（没有分隔符）时视为无有效食材
+    ingredients_list = [name.strip() for name in ingredients.split('、')]
+    if len(ingredients_list) <= 1:
+        return []
+    return list(dict.fromkeys(name for name in ingredients_list if name))
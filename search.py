@@ -0,0 +1,31 @@
+# search.py
+import re
+from sqlalchemy import desc
+from sqlalchemy.dialects.mysql import match
+
+NGRAM_TOKEN_SIZE = 2  # 与 MySQL ngram_token_size 保持一致（默认 2）
+ASCII_WORD = re.compile(r'[A-Za-z0-9]')
+
+
+def apply_search(query, column, term):
+    """
+    关键词搜索：纯中文等非 ASCII 关键词且长度不小于 ngram 长度时，走 FULLTEXT(ngram) 索引并按相关度排序；
+    其余情况退回 LIKE 匹配：
+    - 更短的关键词无法命中 ngram 索引
+    - 含 ASCII 字母或数字的关键词：InnoDB 默认停用词表（a、i、the 等英文词）会使 ngram 丢弃所有包含停用词的分词，
+      例如 admin 的 ad、mi、in 都会被丢弃，结果不正确
+    """
+    term = (term or '').strip()
+    if not term:
+        return query
+
+    if len(term) < NGRAM_TOKEN_SIZE or ASCII_WORD.search(term):
+        return query.filter(column.ilike(f'%{term}%'))
+
+    relevance = match(column, against=boolean_phrase(term)).in_boolean_mode()
+    return query.filter(relevance).order_by(desc(relevance))
+
+
+def boolean_phrase(term):
+    # 按短语匹配，去掉布尔模式下的引号
+    return '"' + term.replace('"', ' ') + '"'
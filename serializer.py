@@ -0,0 +1,46 @@
+# serializer.py
+import json
+from datetime import date, datetime
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # ujson 为可选依赖
+    ujson = None
+
+
+def _default(obj):
+    # 日期统一输出为 ISO 8601 字符串
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps_orjson(obj):
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+
+def _dumps_ujson(obj):
+    return ujson.dumps(obj, default=_default)
+
+
+def _dumps_json(obj):
+    return json.dumps(obj, default=_default)
+
+
+# 按可用性选择序列化实现：orjson > ujson > 标准库 json
+if orjson is not None:
+    dumps = _dumps_orjson
+elif ujson is not None:
+    dumps = _dumps_ujson
+else:
+    dumps = _dumps_json
+
+
+def dumps_js(obj):
+    # JSONP 输出为 JavaScript：orjson 不转义 U+2028 / U+2029，它们在旧版 JS 中是换行符，会打断脚本
+    return dumps(obj).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
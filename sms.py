@@ -1,24 +1,77 @@
 # sms.py
+import os
 import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 logger = logging.getLogger(__name__)  # 获取当前模块的 logger
 
+BARK_URL = os.getenv('BARK_URL', "https://api.day.app/push")
+PUSH_TIMEOUT = (3, 10)  # 连接超时、读取超时（秒）
+PUSH_CONCURRENCY = 10  # 批量推送的最大并发数
 
-def send_message(user,message, title="Daily Events"):
-    url = "https://api.day.app/push"
+
+def _build_session(pool_size=PUSH_CONCURRENCY):
+    # 复用连接池，对瞬时失败（连接错误、429、5xx）按指数退避重试
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['POST']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        "Content-Type": "application/json; charset=utf-8"
+    })
+    return session
+
+
+http = _build_session()
+
+
+def _push(user, message, title, url=None, timeout=PUSH_TIMEOUT):
     payload = {
         "body": message,
         "title": title,
         "device_key": user
     }
-    headers = {
-        "Content-Type": "application/json; charset=utf-8"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
+    try:
+        response = http.post(url or BARK_URL, json=payload, timeout=timeout)
+    except requests.exceptions.RequestException as e:
+        logger.error("======send_error")
+        logger.error(e)
+        return {"device_key": user, "ok": False, "status": None, "error": str(e)}
 
     if response.status_code == 200:
-        pass
-    else:
-        logger.error("======send_error")
-        logger.error(response)
+        return {"device_key": user, "ok": True, "status": response.status_code, "error": None}
+
+    logger.error("======send_error")
+    logger.error(response)
+    return {"device_key": user, "ok": False, "status": response.status_code, "error": response.text[:200]}
+
+
+def send_message(user, message, title="Daily Events"):
+    return _push(user, message, title)
+
+
+def send_batch(items, concurrency=PUSH_CONCURRENCY, url=None, timeout=PUSH_TIMEOUT):
+    """
+    并发推送多条消息，items 为 (device_key, message, title) 列表，
+    按输入顺序返回每个设备的推送结果
+    """
+    if not items:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        return list(executor.map(lambda item: _push(*item, url=url, timeout=timeout), items))
+
+
+def send_messages(device_keys, message, title="Daily Events", **kwargs):
+    # 同一条消息推送给多个设备
+    return send_batch([(device_key, message, title) for device_key in device_keys], **kwargs)
@@ -0,0 +1,228 @@
+# tasks.py
+import logging
+import os
+import time
+from datetime import datetime, date, timedelta
+from celery import chord, group
+from celery.signals import task_prerun, task_postrun
+from extensions import celery
+from services import redis_client
+from models import db, Event, User, ScheduledTask, TaskRun
+from message import build_menu_message, get_push_device_keys
+from sms import send_messages, send_batch
+from image import generate_variants
+from scrape import crawl_pages, update_job
+
+logger = logging.getLogger(__name__)  # 获取当前模块的 logger
+
+PUSH_CHUNK_SIZE = 100  # 每个子任务推送的设备数
+PUSH_LOCK_TTL = 86400  # 同一调度时刻的推送锁有效期（秒）
+
+# 提前多少天提醒（0 表示当天）
+REMINDER_OFFSETS = [int(offset) for offset in os.getenv('REMINDER_OFFSETS', '0,1,7,30').split(',') if offset.strip()]
+REMINDER_CHUNK_SIZE = 500  # 每个子任务推送的用户数
+REMINDER_KEY_TTL = 2 * 86400  # 提醒幂等键的有效期（秒）
+TASK_RUN_RETENTION_DAYS = int(os.getenv('TASK_RUN_RETENTION_DAYS', 30))  # 周期任务运行记录的保留天数
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def request_header(request, name):
+    # 读取 beat 写入的自定义消息头（见 beat_scheduler），不同 Celery 版本分别放在 request 属性或 request.headers 中
+    value = getattr(request, name, None)
+    if value is None:
+        value = (getattr(request, 'headers', None) or {}).get(name)
+    return value
+
+
+@celery.task(bind=True)
+def daily_menu_push(self, tick=None):
+    """每日菜单推送：按批次拆分接收人并行发送，同一调度时刻只执行一次"""
+    # 锁按 beat 下发时的调度时刻（分钟），而不是 worker 开始执行的时间：
+    # 队列积压或多个 beat 重复下发同一时刻时共用一把锁，一天多次调度的各时刻互不影响
+    tick = tick or request_header(self.request, 'beat_tick') or celery.now().strftime('%Y%m%d%H%M')
+    lock_key = f"lock:daily_menu_push:{tick}"
+
+    if not redis_client.set(lock_key, 1, nx=True, ex=PUSH_LOCK_TTL):
+        logger.info(f"daily_menu_push {tick} 已执行，跳过")
+        return {"tick": tick, "skipped": True}
+
+    try:
+        message = build_menu_message()
+        if not message:
+            logger.info("daily_menu_push 没有菜")
+            return {"tick": tick, "chunks": 0}
+
+        chunks = chunked(get_push_device_keys(), PUSH_CHUNK_SIZE)
+        if not chunks:
+            return {"tick": tick, "chunks": 0}
+
+        chord(push_menu_chunk.s(chunk, message, '今日菜单') for chunk in chunks)(summarize_push.s(tick))
+    except Exception:
+        # 数据库或 broker 不可用时释放锁，允许该时刻重试
+        redis_client.delete(lock_key)
+        raise
+    return {"tick": tick, "chunks": len(chunks)}
+
+
+@celery.task
+def push_menu_chunk(device_keys, message, title):
+    """推送一批设备"""
+    results = send_messages(device_keys, message, title)
+    return {
+        "total": len(results),
+        "failed": [result['device_key'] for result in results if not result['ok']],
+    }
+
+
+@celery.task
+def summarize_push(results, tick):
+    """汇总各批次的推送结果"""
+    total = sum(result['total'] for result in results)
+    failed = [device_key for result in results for device_key in result['failed']]
+    if failed:
+        logger.error(f"========daily_menu_push {tick} failed: {len(failed)}/{total}")
+    else:
+        logger.info(f"daily_menu_push {tick} done: {total}")
+    return {"tick": tick, "total": total, "failed": len(failed)}
+
+
+@celery.task
+def scrape_job(job_id, start, end, concurrency):
+    """后台爬取菜谱，进度写入 Redis（scrape:job:<job_id>）"""
+    update_job(job_id, status='running')
+    try:
+        stats = crawl_pages(start, end, concurrency, job_id=job_id)
+    except Exception as e:
+        logger.error("========scrape_job_error")
+        logger.error(e)
+        update_job(job_id, status='failed', error=str(e))
+        raise
+
+    update_job(job_id, status='done')
+    return stats
+
+
+@celery.task
+def event_reminder_push(day=None):
+    """每日事件提醒：找出 N 天后到期的事件，按用户合并为一条消息并行推送"""
+    today = date.fromisoformat(day) if day else date.today()
+    day = today.isoformat()
+    offsets = {today + timedelta(days=offset): offset for offset in REMINDER_OFFSETS}
+
+    # 一次 target_date 索引查询取出所有需要提醒的事件
+    rows = db.session.query(Event.user_id, Event.name, Event.target_date, User.device_key) \
+        .join(User, User.id == Event.user_id) \
+        .filter(Event.target_date.in_(list(offsets)), User.device_key.isnot(None), User.device_key != '') \
+        .order_by(Event.user_id, Event.target_date) \
+        .yield_per(5000)
+
+    messages = {}
+    for row in rows:
+        offset = offsets[row.target_date]
+        line = f"{row.name}: 就是今天" if offset == 0 else f"{row.name}: 还有 {offset} 天"
+        messages.setdefault(row.user_id, (row.device_key, []))[1].append(line)
+
+    items = [[user_id, device_key, '\n'.join(lines)] for user_id, (device_key, lines) in messages.items()]
+    chunks = chunked(items, REMINDER_CHUNK_SIZE)
+    if chunks:
+        group(push_reminder_chunk.s(day, chunk) for chunk in chunks).apply_async()
+    return {"day": day, "users": len(items), "chunks": len(chunks)}
+
+
+@celery.task
+def push_reminder_chunk(day, items):
+    """推送一批用户的事件提醒，同一用户同一天只推送一次"""
+    keys = [f"reminder:{day}:{user_id}" for user_id, _, _ in items]
+
+    # 先占用幂等键，重试或重复调度时已占用的用户直接跳过
+    pipe = redis_client.pipeline()
+    for key in keys:
+        pipe.set(key, 'sending', nx=True, ex=REMINDER_KEY_TTL)
+    claimed = [(key, item) for key, item, ok in zip(keys, items, pipe.execute()) if ok]
+    if not claimed:
+        return {"day": day, "sent": 0, "failed": 0}
+
+    results = send_batch([(device_key, message, '事件提醒') for _, (_, device_key, message) in claimed])
+
+    # 推送失败的释放幂等键，允许下次重试
+    pipe = redis_client.pipeline()
+    failed = 0
+    for (key, _), result in zip(claimed, results):
+        if result['ok']:
+            pipe.set(key, 'sent', ex=REMINDER_KEY_TTL)
+        else:
+            pipe.delete(key)
+            failed += 1
+    pipe.execute()
+
+    if failed:
+        logger.error(f"========event_reminder_push {day} failed: {failed}/{len(claimed)}")
+    return {"day": day, "sent": len(claimed) - failed, "failed": failed}
+
+
+@celery.task
+def generate_image_variants(path):
+    """生成上传图片的缩略图和 WebP 版本"""
+    try:
+        generate_variants(path)
+    except Exception as e:
+        logger.error("========generate_image_variants_error")
+        logger.error(e)
+        raise
+
+
+# 周期任务的开始时间：celery 任务 ID -> (周期任务 ID, 开始时间, monotonic 计时)，prerun 与 postrun 在同一进程中触发
+_run_starts = {}
+
+
+def _scheduled_task_id(request):
+    # beat 下发周期任务时在消息头中带上 scheduled_task_id（见 beat_scheduler）
+    value = request_header(request, 'scheduled_task_id')
+    return int(value) if value else None
+
+
+@task_prerun.connect
+def record_run_start(task_id=None, task=None, **kwargs):
+    # 只记录 beat 按 ScheduledTask 下发的运行，推送分片、缩略图、爬取等子任务不记录
+    scheduled_task_id = _scheduled_task_id(task.request)
+    if scheduled_task_id:
+        _run_starts[task_id] = (scheduled_task_id, datetime.utcnow(), time.monotonic())
+
+
+@task_postrun.connect
+def record_run_end(task_id=None, task=None, state=None, **kwargs):
+    """写入周期任务运行记录并清理过期记录，同时更新上次/下次运行时间"""
+    started = _run_starts.pop(task_id, None)
+    if started is None:
+        return
+    scheduled_task_id, started_at, start = started
+    duration_ms = int((time.monotonic() - start) * 1000)
+
+    from app import app
+    try:
+        with app.app_context():
+            db.session.add(TaskRun(
+                scheduled_task_id=scheduled_task_id,
+                task_name=task.name,
+                started_at=started_at,
+                duration_ms=duration_ms,
+                status=state or 'UNKNOWN',
+                worker=task.request.hostname,
+            ))
+            # 按 (scheduled_task_id, started_at) 索引删除该任务的过期记录
+            TaskRun.query.filter(
+                TaskRun.scheduled_task_id == scheduled_task_id,
+                TaskRun.started_at < started_at - timedelta(days=TASK_RUN_RETENTION_DAYS),
+            ).delete(synchronize_session=False)
+
+            scheduled = db.session.get(ScheduledTask, scheduled_task_id)
+            if scheduled:
+                scheduled.last_run = started_at
+                scheduled.refresh_next_run(started_at)
+            db.session.commit()
+    except Exception as e:
+        logger.error("========record_run_error")
+        logger.error(e)
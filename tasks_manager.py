@@ -1,9 +1,12 @@
-from datetime import timedelta
+import math
+from datetime import datetime
 
 from flask import Blueprint, request
 import constants
 from decorators import login_required, response_format, admin_required
-from models import db, ScheduledTask, CrontabSchedule, IntervalSchedule
+from pagination import paginate
+from cache import bump_version
+from models import db, ScheduledTask, CrontabSchedule, IntervalSchedule, TaskRun
 from celery import current_app
 import logging
 from extensions import celery
@@ -59,8 +62,16 @@ def task_save():
             )
             db.session.add(task)
 
+        # 先校验再提交，无效的任务不会写入数据库
+        error = validate_task(task)
+        if error:
+            db.session.rollback()
+            return error
+
+        task.refresh_next_run()
         db.session.commit()
-        send_celery(task)
+        # 通知 beat（beat_scheduler.DatabaseScheduler）重新加载，几秒内生效
+        bump_version('scheduled_tasks')
         return {"code": constants.RESULT_SUCCESS, "message": "操作成功"}
 
     except Exception as e:
@@ -74,8 +85,6 @@ def task_save():
 @response_format
 def get_tasks():
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
     name = request.args.get('name', '')
 
     # 构建查询
@@ -85,11 +94,12 @@ def get_tasks():
     if name:
         query = query.filter(ScheduledTask.name.ilike(f'%{name}%'))
 
-    # 获取总记录数
-    total = query.count()
+    # due=1 只返回已到期的任务，走 (is_active, next_run_at) 索引的范围查询
+    if request.args.get('due', 0, type=int):
+        query = query.filter(ScheduledTask.is_active == True, ScheduledTask.next_run_at <= datetime.utcnow())
 
-    # 分页查询
-    tasks = query.offset((page - 1) * page_size).limit(page_size).all()
+    # 分页查询（传入 after 时使用游标分页）
+    tasks, total, next_cursor = paginate(query, ScheduledTask.id)
 
     # 返回数据
     return {
@@ -104,9 +114,12 @@ def get_tasks():
                 'schedule_type': task.schedule_type,
                 'crontab_id': task.crontab_id,
                 'interval_id': task.interval_id,
+                'last_run': task.last_run,
+                'next_run_at': task.next_run_at,
             } for task in tasks
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
     }
 
 
@@ -123,8 +136,10 @@ def delete_task():
         return {"code": constants.RESULT_FAIL, "message": "任务不存在"}
 
     try:
+        TaskRun.query.filter_by(scheduled_task_id=task.id).delete()
         db.session.delete(task)
         db.session.commit()
+        bump_version('scheduled_tasks')
         return {"code": constants.RESULT_SUCCESS, "message": "任务删除成功"}
     except Exception as e:
         db.session.rollback()  # 回滚事务
@@ -158,64 +173,68 @@ def get_tasks_list():
     }
 
 
-def send_celery(new_task):
-    task_path = new_task.task_type
-    task_name = task_path.split('.')[-1]
+# 任务运行记录
+@tasks_bp.route('/tasks/<int:task_id>/runs', methods=['GET'])
+@login_required
+@admin_required
+@response_format
+def get_task_runs(task_id):
+    # 最近 limit 次运行记录及耗时分位数
+    limit = min(request.args.get('limit', 100, type=int), 1000)
 
-    # 动态获取任务对象
-    task = celery.tasks.get(task_path)
-    try:
+    runs = TaskRun.query.filter_by(scheduled_task_id=task_id) \
+        .order_by(TaskRun.started_at.desc()).limit(limit).all()
+    durations = sorted(run.duration_ms for run in runs)
 
-        if not task:
-            return {"code": constants.RESULT_FAIL, "message": "任务未找到"}
-
-        if new_task.is_active == False:
-            # 暂停任务
-            celery.control.revoke(task_name)
-            return {"code": constants.RESULT_SUCCESS, "message": "任务已暂停"}
-
-        if new_task.schedule_type == 'crontab':
-            crontab = CrontabSchedule.query.get(new_task.crontab_id)
-            if not crontab:
-                return {"code": constants.RESULT_FAIL, "message": "Crontab 未找到"}
-
-            # 创建 Celery 的 crontab 调度
-            celery.add_periodic_task(
-                crontab(minute=crontab.minute, hour=crontab.hour,
-                        day_of_week=crontab.day_of_week,
-                        day_of_month=crontab.day_of_month,
-                        month_of_year=crontab.month_of_year),
-                task.s(),
-                name=f'task-{new_task.name}'  # 可选，给任务一个唯一的名称
-            )
-        elif new_task.schedule_type == 'interval':
-            interval_period = IntervalSchedule.query.get(new_task.interval_id)
-            if not interval_period:
-                return {"code": constants.RESULT_FAIL, "message": "Interval 未找到"}
-
-            # 根据 period 字段的值计算间隔时间（单位：秒）
-            if interval_period.period == 'seconds':
-                interval_seconds = interval_period.every
-            elif interval_period.period == 'minutes':
-                interval_seconds = interval_period.every * 60
-            elif interval_period.period == 'hours':
-                interval_seconds = interval_period.every * 3600
-            elif interval_period.period == 'days':
-                interval_seconds = interval_period.every * 86400
-            else:
-                return {"code": constants.RESULT_FAIL, "message": "无效的 period 参数"}
-
-            # 添加周期性任务
-            celery.add_periodic_task(
-                interval_seconds,  # 间隔时间，单位：秒
-                task.s(),
-                name=f'task-{new_task.name}',  # 给任务一个唯一的名称
-            )
-        else:
-            return {"code": constants.RESULT_FAIL, "message": "无效的 schedule_type 参数"}
-    except Exception as e:
-        logger.error("========add_task_erroe")
-        logger.error(e)
-        print(e)
+    return {
+        "code": constants.RESULT_SUCCESS,
+        'data': [
+            {
+                'id': run.id,
+                'started_at': run.started_at,
+                'duration_ms': run.duration_ms,
+                'status': run.status,
+                'worker': run.worker,
+            } for run in runs
+        ],
+        'stats': {
+            'count': len(durations),
+            'failed': sum(1 for run in runs if run.status != 'SUCCESS'),
+            'p50': percentile(durations, 50),
+            'p95': percentile(durations, 95),
+            'max': durations[-1] if durations else None,
+        }
+    }
+
+
+def percentile(values, p):
+    # 最近秩法求分位数，values 需已排序
+    if not values:
+        return None
+    index = max(math.ceil(p / 100 * len(values)) - 1, 0)
+    return values[index]
 
-    return {"code": constants.RESULT_SUCCESS, "message": "任务添加成功"}
\ No newline at end of file
+
+def validate_task(new_task):
+    """校验任务函数和调度配置，有误时返回错误信息，否则返回 None"""
+    # 动态获取任务对象
+    if not celery.tasks.get(new_task.task_type):
+        return {"code": constants.RESULT_FAIL, "message": "任务未找到"}
+
+    # 暂停的任务不校验调度配置
+    if new_task.is_active == False:
+        return None
+
+    if new_task.schedule_type == 'crontab':
+        if not new_task.crontab_id or not CrontabSchedule.query.get(new_task.crontab_id):
+            return {"code": constants.RESULT_FAIL, "message": "Crontab 未找到"}
+    elif new_task.schedule_type == 'interval':
+        interval_period = IntervalSchedule.query.get(new_task.interval_id) if new_task.interval_id else None
+        if not interval_period:
+            return {"code": constants.RESULT_FAIL, "message": "Interval 未找到"}
+        if interval_period.period not in dict(IntervalSchedule.PERIOD_CHOICES):
+            return {"code": constants.RESULT_FAIL, "message": "无效的 period 参数"}
+    else:
+        return {"code": constants.RESULT_FAIL, "message": "无效的 schedule_type 参数"}
+
+    return None
@@ -0,0 +1,79 @@
+# tests/conftest.py
+import os
+import sys
+
+import fakeredis
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, User  # noqa: E402
+from services import redis_client  # noqa: E402
+from cache import sessions  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    # 测试用应用：SQLite 内存库 + fakeredis，只注册被测的蓝图
+    from food import food_bp
+    from crontab import crontab_bp
+    from scrape import scrape_bp
+    from image import image_bp
+    from tasks_manager import tasks_bp
+    from auth import auth_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['REDIS_URL'] = 'redis://localhost:6379/0'
+    app.config['TESTING'] = True
+    db.init_app(app)
+    redis_client.provider_class = fakeredis.FakeRedis
+    redis_client.init_app(app)
+    app.register_blueprint(food_bp)
+    app.register_blueprint(crontab_bp)
+    app.register_blueprint(scrape_bp)
+    app.register_blueprint(image_bp)
+    app.register_blueprint(tasks_bp)
+    app.register_blueprint(auth_bp)
+
+    with app.app_context():
+        db.create_all()
+        redis_client.flushall()
+        sessions.tokens.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username='admin', password='x', is_admin=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    sessions.create(user, '1700000000')
+    return {'token': f'1700000000_{user.id}'}
+
+
+@pytest.fixture
+def query_counter(app):
+    # 统计发送到数据库的 SQL 语句数
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
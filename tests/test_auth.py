@@ -0,0 +1,24 @@
+# tests/test_auth.py
+import constants
+from cache import sessions
+
+
+def test_logout_deletes_the_session_of_a_valid_token(client, user, auth_headers):
+    resp = client.post('/logout', json={'token': auth_headers['token']})
+
+    assert resp.get_json()['code'] == constants.RESULT_SUCCESS
+    assert sessions.verify(auth_headers['token']) is None
+
+
+def test_logout_with_a_stale_timestamp_keeps_the_current_session(client, user, auth_headers):
+    resp = client.post('/logout', json={'token': f'1600000000_{user.id}'})
+
+    assert resp.get_json()['code'] == constants.RESULT_FAIL
+    assert sessions.verify(auth_headers['token'])['id'] == user.id
+
+
+def test_logout_rejects_the_old_token_format(client, user, auth_headers):
+    resp = client.post('/logout', json={'token': f'1700000000:{user.id}'})
+
+    assert resp.get_json()['code'] == constants.RESULT_FAIL
+    assert sessions.verify(auth_headers['token'])['id'] == user.id
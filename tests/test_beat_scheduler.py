@@ -0,0 +1,85 @@
+# tests/test_beat_scheduler.py
+import pytest
+
+import constants
+import tasks  # noqa: F401  注册 Celery 任务
+from beat_scheduler import DatabaseScheduler, SCHEDULE_TABLES
+from cache import bump_version, table_versions
+from extensions import celery
+from models import db, ScheduledTask, CrontabSchedule
+
+
+@pytest.fixture
+def crontab(app):
+    crontab = CrontabSchedule(minute='5', hour='14', day_of_week='*', day_of_month='*', month_of_year='*')
+    db.session.add(crontab)
+    db.session.commit()
+    return crontab
+
+
+@pytest.fixture
+def scheduler(app, monkeypatch):
+    # 结果后端不支持自动过期时才会安装 celery.backend_cleanup
+    monkeypatch.setattr(type(celery.backend), 'supports_autoexpire', False)
+    scheduler = DatabaseScheduler(app=celery, lazy=True)
+    scheduler.flask_app = app
+    return scheduler
+
+
+def reload(scheduler):
+    scheduler._check_versions(force=True)
+    return scheduler.data
+
+
+def test_reload_keeps_static_default_and_database_entries(scheduler, crontab):
+    db.session.add(ScheduledTask(name='menu', task_type='tasks.daily_menu_push', schedule_type='crontab',
+                                 crontab_id=crontab.id, is_active=True))
+    db.session.commit()
+
+    for _ in range(2):
+        entries = reload(scheduler)
+        assert 'daily-menu-push' in entries
+        assert 'celery.backend_cleanup' in entries
+        assert entries['task-menu'].task == 'tasks.daily_menu_push'
+        assert entries['task-menu'].options['headers']['scheduled_task_id'] > 0
+
+
+def test_unknown_task_type_is_rejected_before_commit(client, auth_headers, crontab):
+    versions = table_versions(SCHEDULE_TABLES)
+    response = client.post('/tasks/save', json={
+        'name': 'bad', 'task_name': 'tasks.missing', 'schedule_type': 'crontab', 'crontab_id': crontab.id,
+    }, headers=auth_headers)
+
+    assert response.get_json()['code'] == constants.RESULT_FAIL
+    assert ScheduledTask.query.count() == 0
+    assert table_versions(SCHEDULE_TABLES) == versions
+
+
+def test_saving_a_task_bumps_the_schedule_version(client, auth_headers, crontab):
+    bump_version('scheduled_tasks')
+    before = table_versions(['scheduled_tasks'])[0]
+    response = client.post('/tasks/save', json={
+        'name': 'menu', 'task_name': 'tasks.daily_menu_push', 'schedule_type': 'crontab', 'crontab_id': crontab.id,
+    }, headers=auth_headers)
+
+    assert response.get_json()['code'] == constants.RESULT_SUCCESS
+    assert table_versions(['scheduled_tasks'])[0] == before + 1
+    assert ScheduledTask.query.one().next_run_at is not None
+
+
+def test_sent_messages_carry_the_beat_tick_without_changing_the_entry(scheduler, crontab, monkeypatch):
+    from celery.beat import Scheduler
+
+    sent = []
+    monkeypatch.setattr(Scheduler, 'apply_async', lambda self, entry, producer=None, advance=True, **kwargs: sent.append(entry))
+    db.session.add(ScheduledTask(name='menu', task_type='tasks.daily_menu_push', schedule_type='crontab',
+                                 crontab_id=crontab.id, is_active=True))
+    db.session.commit()
+    entry = reload(scheduler)['task-menu']
+
+    DatabaseScheduler.apply_async(scheduler, entry, advance=False)
+
+    headers = sent[0].options['headers']
+    assert len(headers['beat_tick']) == 12
+    assert headers['scheduled_task_id'] == entry.options['headers']['scheduled_task_id']
+    assert 'beat_tick' not in entry.options['headers']
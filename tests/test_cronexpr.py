@@ -0,0 +1,148 @@
+# tests/test_cronexpr.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from celery import Celery
+from celery.schedules import crontab
+
+import constants
+from cronexpr import compile_expression, CronSyntaxError, FIELDS
+from models import db, CrontabSchedule
+
+EXPRESSIONS = [
+    '* * * * *',
+    '5 14 * * *',
+    '*/15 9-17 * * mon-fri',
+    '0 0 1,15 jan,jul sun',
+    '30 */2 1-10/3 * *',
+    '5/20 0 * * *',
+    '0 12 * * 0',
+    '0 0 31 * mon',
+    '15 3 * 2 sat,sun',
+    '0 0 29 2 *',
+    '*/7 */5 */3 */2 *',
+]
+
+STARTS = [
+    datetime(2026, 10, 18, 13, 7, 30),
+    datetime(2026, 12, 31, 23, 59, 30),
+    datetime(2027, 2, 27, 5, 0, 30),
+]
+
+# 调度计算使用 UTC 的独立 Celery 应用，避免受项目时区配置影响
+utc_app = Celery(set_as_current=False)
+utc_app.conf.timezone = 'UTC'
+utc_app.conf.enable_utc = True
+
+
+def celery_crontab(expression, now=None):
+    fields = compile_expression(expression).as_dict()
+    return crontab(app=utc_app, nowfun=(lambda: now) if now else None, **fields)
+
+
+def celery_next_runs(expression, start, count):
+    # 用 Celery 的 remaining_estimate 逐次推算下次触发时间
+    results = []
+    now = start.replace(tzinfo=timezone.utc)
+    for _ in range(count):
+        run_at = now + celery_crontab(expression, now).remaining_estimate(now)
+        results.append(run_at.replace(tzinfo=None, second=0, microsecond=0))
+        now = run_at + timedelta(seconds=30)
+    return results
+
+
+def bit_set(bits):
+    return {i for i in range(bits.bit_length()) if bits >> i & 1}
+
+
+@pytest.mark.parametrize('expression', EXPRESSIONS)
+def test_bitsets_match_celery_crontab_sets(expression):
+    compiled = compile_expression(expression)
+    schedule = celery_crontab(expression)
+    assert bit_set(compiled.minutes) == schedule.minute
+    assert bit_set(compiled.hours) == schedule.hour
+    assert bit_set(compiled.days) == schedule.day_of_month
+    assert bit_set(compiled.months) == schedule.month_of_year
+    assert bit_set(compiled.weekdays) == schedule.day_of_week
+
+
+@pytest.mark.parametrize('expression', EXPRESSIONS)
+@pytest.mark.parametrize('start', STARTS)
+def test_next_runs_match_celery(expression, start):
+    assert compile_expression(expression).next_runs(start, 5) == celery_next_runs(expression, start, 5)
+
+
+def test_next_runs_are_strictly_after_start_and_match():
+    compiled = compile_expression('*/15 9-17 * * mon-fri')
+    start = datetime(2026, 10, 19, 9, 15)
+    runs = compiled.next_runs(start, 3)
+    assert runs == [datetime(2026, 10, 19, 9, 30), datetime(2026, 10, 19, 9, 45), datetime(2026, 10, 19, 10, 0)]
+    assert all(compiled.matches(run_at) for run_at in runs)
+
+
+def test_compiled_expressions_are_memoized_and_normalized():
+    assert compile_expression('0 9 * jan mon-fri') is compile_expression('0 9 * jan mon-fri')
+    assert str(compile_expression('0 9 * jan mon-fri')) == '0 9 * 1 1-5'
+    assert str(compile_expression('5/20 0 * * *')) == '5-59/20 0 * * *'
+    assert list(compile_expression('1 2 3 4 5').as_dict()) == [name for name, _, _, _ in FIELDS]
+
+
+@pytest.mark.parametrize('expression', [
+    None,
+    '',
+    '* * * *',
+    '* * * * * *',
+    '60 * * * *',
+    '* 24 * * *',
+    '* * 0 * *',
+    '* * * 13 *',
+    '0 0 * * 7',
+    '5-1 * * * *',
+    '*/0 * * * *',
+    '1,,2 * * * *',
+    'a * * * *',
+    '* * * foo *',
+    '0 0 30 2 *',
+    '0 0 31 4,6,9,11 *',
+])
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(CronSyntaxError):
+        compile_expression(expression)
+
+
+def test_preview_returns_upcoming_fire_times(client, auth_headers):
+    response = client.get('/crontab/preview?schedule=*/15 9-17 * * mon-fri&count=3', headers=auth_headers)
+    body = response.get_json()
+    assert body['code'] == constants.RESULT_SUCCESS
+    assert body['schedule'] == '*/15 9-17 * * 1-5'
+    assert len(body['data']) == 3
+    runs = [datetime.fromisoformat(value) for value in body['data']]
+    assert runs == sorted(runs)
+    assert all(run_at.minute % 15 == 0 and 9 <= run_at.hour <= 17 and run_at.isoweekday() <= 5 for run_at in runs)
+
+
+def test_preview_of_saved_crontab(client, auth_headers):
+    crontab_item = CrontabSchedule(minute='5', hour='14', day_of_week='*', day_of_month='*', month_of_year='*')
+    db.session.add(crontab_item)
+    db.session.commit()
+    body = client.get(f'/crontab/preview?id={crontab_item.id}', headers=auth_headers).get_json()
+    assert body['schedule'] == '5 14 * * *'
+    assert len(body['data']) == 5
+
+
+def test_preview_rejects_bad_expression(client, auth_headers):
+    body = client.get('/crontab/preview?schedule=61 * * * *', headers=auth_headers).get_json()
+    assert body['code'] == constants.RESULT_FAIL
+
+
+def test_save_rejects_bad_expression(client, auth_headers):
+    body = client.post('/crontab/save', json={'schedule': '0 0 30 2 *'}, headers=auth_headers).get_json()
+    assert body['code'] == constants.RESULT_FAIL
+    assert CrontabSchedule.query.count() == 0
+
+
+def test_save_stores_normalized_fields(client, auth_headers):
+    body = client.post('/crontab/save', json={'schedule': '0 9 * jan mon-fri'}, headers=auth_headers).get_json()
+    assert body['code'] == constants.RESULT_SUCCESS
+    saved = db.session.get(CrontabSchedule, body['crontab_id'])
+    assert saved.expression == '0 9 * 1 1-5'
@@ -0,0 +1,19 @@
+# tests/test_explain.py
+from sqlalchemy.dialects import mysql
+
+from explain import checked_queries, list_queries
+
+
+def test_every_list_checks_cursor_pages_and_exempts_offset_and_count(app):
+    checked = {label: exempt for label, query, exempt in checked_queries()}
+    for label, query, column in list_queries():
+        assert checked[f'{label} cursor first'] is False
+        assert checked[f'{label} cursor next'] is False
+        assert checked[f'{label} offset'] is True
+        assert checked[f'{label} count'] is True
+
+
+def test_admin_event_list_is_checked_without_user_filter(app):
+    queries = {label: query for label, query, exempt in checked_queries()}
+    sql = str(queries['event (admin) cursor next'].statement.compile(dialect=mysql.dialect()))
+    assert 'user_id =' not in sql
@@ -0,0 +1,64 @@
+# tests/test_food.py
+from models import db, Food, Image, Cate, Ingredient, FoodCate, FoodIngredient
+
+
+def seed_foods(user, count):
+    cate = Cate(name='家常菜', user_id=user.id)
+    ingredients = [Ingredient(name=f'食材{i}', user_id=user.id) for i in range(3)]
+    db.session.add(cate)
+    db.session.add_all(ingredients)
+    for i in range(count):
+        food = Food(name=f'菜{i}', procedure='做法', user_id=user.id)
+        food.cate = [FoodCate(cate=cate)]
+        food.ingredient = [FoodIngredient(ingredient=ingredient) for ingredient in ingredients]
+        food.images = [Image(url=f'/img/{i}.jpg')]
+        db.session.add(food)
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def list_foods(client, auth_headers, query_counter, page_size):
+    query_counter.clear()
+    response = client.get(f'/food?pageSize={page_size}', headers=auth_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body['data']) == page_size
+    db.session.expunge_all()
+    return len(query_counter), body
+
+
+def test_get_foods_query_count_does_not_grow_with_page_size(client, user, auth_headers, query_counter):
+    seed_foods(user, 60)
+
+    small, _ = list_foods(client, auth_headers, query_counter, 5)
+    large, body = list_foods(client, auth_headers, query_counter, 50)
+
+    assert small == large
+    # count + 分页查询 + 分类、图片、食材三次预加载
+    assert large <= 5
+    first = body['data'][0]
+    assert len(first['ing_names']) == 3
+    assert first['images'] == ['/img/0.jpg']
+
+
+def import_lines(client, auth_headers, *lines):
+    return client.post('/food/import', headers=auth_headers, data='\n'.join(lines).encode('utf-8')).get_json()
+
+
+def test_import_counts_lines_with_wrong_field_types_as_invalid(client, user, auth_headers):
+    body = import_lines(
+        client, auth_headers,
+        '{"name": "红烧肉", "procedure": "炖", "cate": ["家常菜"], "ingredients": ["猪肉", "糖"], "images": ["/img/a.jpg"]}',
+        '{"name": "字符串图片", "images": "/img/b.jpg"}',
+        '{"name": "数字做法", "procedure": 12}',
+        '{"name": "对象食材", "ingredients": [{"name": "盐"}]}',
+        '{"name": 42}',
+        'not json',
+        '{"name": "糖醋排骨"}',
+    )
+
+    assert body['data'] == {'read': 7, 'inserted': 2, 'duplicates': 0, 'invalid': 5}
+    food = Food.query.filter_by(name='红烧肉').one()
+    assert [image.url for image in food.images] == ['/img/a.jpg']
+    assert Food.query.filter_by(name='糖醋排骨').one().procedure == ''
+    assert Image.query.count() == 1
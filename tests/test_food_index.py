@@ -0,0 +1,25 @@
+# tests/test_food_index.py
+import food_index
+from models import db, FoodIngredient
+
+
+def add_foods(recipes):
+    for food_id, ingredient_ids in recipes.items():
+        for ingredient_id in ingredient_ids:
+            db.session.add(FoodIngredient(food_id=food_id, ingredient_id=ingredient_id))
+    db.session.commit()
+
+
+def test_match_foods_sorts_by_coverage(app):
+    add_foods({1: [1, 2], 2: [1], 3: [1, 2, 3, 4], 4: [5]})
+
+    assert food_index.match_foods([1, 2]) == [(1, 2, 2), (2, 1, 1), (3, 2, 4)]
+
+
+def test_match_foods_caps_candidates_by_match_count(app, monkeypatch):
+    # 只取命中食材数最多的 limit * MATCH_CANDIDATES 个候选，命中 1 种食材的菜不参与排序
+    add_foods({1: [1, 2, 3], 2: [1], 3: [1, 2, 3, 4]})
+    assert food_index.match_foods([1, 2], limit=1) == [(2, 1, 1)]
+
+    monkeypatch.setattr(food_index, 'MATCH_CANDIDATES', 2)
+    assert food_index.match_foods([1, 2], limit=1) == [(1, 2, 3)]
@@ -0,0 +1,79 @@
+# tests/test_image.py
+import hashlib
+import io
+
+import pytest
+
+import image
+
+STEM = 'a' * 64
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    monkeypatch.setattr(image, 'image_folder', lambda: str(tmp_path))
+    (tmp_path / f'{STEM}.jpg').write_bytes(b'original')
+    return tmp_path
+
+
+def test_hashed_original_is_cached_immutably(client, folder):
+    response = client.get(f'/img/{STEM}.jpg')
+    assert response.status_code == 200
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == image.IMAGE_MAX_AGE
+
+
+def test_missing_thumb_falls_back_to_original_without_caching(client, folder):
+    response = client.get(f'/img/{STEM}_thumb.jpg')
+    assert response.status_code == 200
+    assert response.data == b'original'
+    assert response.cache_control.no_cache
+    assert response.cache_control.max_age == 0
+    assert not response.cache_control.public
+    assert not response.cache_control.immutable
+
+
+def test_generated_thumb_is_served_immutably(client, folder):
+    (folder / f'{STEM}_thumb.jpg').write_bytes(b'thumb')
+    response = client.get(f'/img/{STEM}_thumb.jpg')
+    assert response.data == b'thumb'
+    assert response.cache_control.immutable
+
+
+def test_unknown_image_is_404(client, folder):
+    assert client.get(f'/img/{"b" * 64}_thumb.jpg').status_code == 404
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    calls = []
+    monkeypatch.setattr(image.celery, 'send_task', lambda name, args: calls.append((name, args)))
+    return calls
+
+
+def upload(client, auth_headers, content=b'original'):
+    return client.post('/image/upload', headers=auth_headers,
+                       data={'file': (io.BytesIO(content), 'photo.jpg')})
+
+
+def test_upload_of_existing_original_requeues_missing_variants(client, auth_headers, folder, queued):
+    # 首次上传时入队失败：原图已写入但没有缩略图，再次上传同一内容时重新入队
+    stem = hashlib.sha256(b'original').hexdigest()
+    (folder / f'{stem}.jpg').write_bytes(b'original')
+
+    resp = upload(client, auth_headers)
+
+    assert resp.get_json()['url'] == f'/img/{stem}.jpg'
+    assert queued == [('tasks.generate_image_variants', [str(folder / f'{stem}.jpg')])]
+
+
+def test_upload_with_variants_present_is_not_queued(client, auth_headers, folder, queued):
+    stem = hashlib.sha256(b'original').hexdigest()
+    for name in image.VARIANT_SIZES:
+        (folder / f'{stem}_{name}.jpg').write_bytes(b'variant')
+        (folder / f'{stem}_{name}.webp').write_bytes(b'variant')
+
+    upload(client, auth_headers)
+
+    assert (folder / f'{stem}.jpg').read_bytes() == b'original'
+    assert queued == []
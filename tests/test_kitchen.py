@@ -0,0 +1,51 @@
+# tests/test_kitchen.py
+import random
+
+import pytest
+from bs4 import BeautifulSoup
+
+from kitchen import parse_stream, parse_bs4, select_parser
+
+PAGE = '''
+<ul>
+  <li><p class="name"><a href="/recipe/1/">  红烧肉 </a></p><p class="ing ellipsis">五花肉、冰糖</p></li>
+  <li><p class="name other"><a href="/recipe/2/">番茄炒蛋</a><a href="/x/">x</a></p>
+      <p class="ing  ellipsis">番茄、&amp;鸡蛋<!-- c --></p></li>
+  <li><p class="ing ellipsis extra">不匹配</p><p class="ellipsis ing">不匹配</p></li>
+</ul>
+'''
+
+
+@pytest.mark.parametrize('html', [
+    PAGE,
+    '<p class="ing  ellipsis">多余空白</p>',
+    '<p class="name"><a href="/r/1">未闭合到文档结尾',
+    '<div><p class="name"><a href="/r/1">a</a></div>b</p>',
+    '<p class="name"><a href="/r/1">a</a><p class="ing ellipsis">b</p>c</p>',
+    '<p class="ing ellipsis">a<br>\n  </br>\n  b<script>var p = "<p>";</script></p>',
+])
+def test_stream_parser_matches_bs4(html):
+    assert parse_stream(html) == parse_bs4(html)
+
+
+def bs4_text_only(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return [tag.text for tag in soup.find_all('p', class_='name')], [tag.text for tag in soup.find_all('p', class_='ing ellipsis')]
+
+
+def test_stream_parser_matches_bs4_on_random_markup():
+    pieces = [
+        '<p class="name">', '<p class="ing ellipsis">', '<p class="ing  ellipsis">', '<p class=" name x">',
+        '<p>', '</p>', '<div>', '</div>', '<a href="/r/1">', '</a>', '<span>', '</span>', '<br>', '</br>',
+        '<img src=x>', 'text', '菜 ', '&amp;', '<!-- c -->', '<script>var a="<p>";</script>', '\n  ',
+        '<p class="name"/>', '<li>', '</li>', '<pre>', '</pre>',
+    ]
+    rng = random.Random(0)
+    for _ in range(2000):
+        html = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 20)))
+        names, ings = parse_stream(html)
+        assert ([text for text, _ in names], ings) == bs4_text_only(html), html
+
+
+def test_auto_backend_uses_the_bs4_compatible_stream_parser():
+    assert select_parser('auto') is parse_stream
@@ -0,0 +1,80 @@
+# tests/test_scrape.py
+import threading
+import time
+
+import pytest
+
+import constants
+from kitchen import Kitchen
+from scrape import SCRAPE_MAX_PAGES
+
+
+@pytest.mark.parametrize('payload', [
+    {'start': 'abc'},
+    {'start': 1, 'end': [2]},
+    {'start': 5, 'end': 1},
+    {'start': -3, 'end': 3},
+    {'start': 1, 'end': SCRAPE_MAX_PAGES + 1},
+    {'start': 1, 'concurrency': -1},
+])
+def test_scrape_rejects_invalid_ranges(client, auth_headers, payload):
+    response = client.post('/scrape', json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['code'] == constants.RESULT_FAIL
+
+
+def test_crawl_keeps_a_bounded_window_of_pages_in_flight():
+    kitchen = Kitchen(concurrency=2)
+    lock = threading.Lock()
+    state = {'submitted': 0, 'peak': 0, 'running': 0}
+
+    def get_page(url):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.002)
+        with lock:
+            state['running'] -= 1
+        return None
+
+    def pages():
+        for page in range(1, 51):
+            state['submitted'] += 1
+            yield page
+
+    kitchen.get_page = get_page
+    results = kitchen.crawl(pages())
+    first = next(results)
+    # 取到第一页时最多只提交了一个窗口的页
+    assert state['submitted'] <= kitchen.concurrency * 2
+    rest = list(results)
+
+    assert sorted(page for page, _ in [first] + rest) == list(range(1, 51))
+    assert state['peak'] <= kitchen.concurrency
+
+
+def test_validators_are_saved_only_for_pages_that_were_saved(app, monkeypatch):
+    import scrape
+
+    def get_page(self, url):
+        self.pending_validators[url] = {'etag': f'"{url}"', 'last_modified': None}
+        return '<p class="name"><a href="/r/1">菜</a></p><p class="ing ellipsis">a、b</p>'
+
+    def save_recipes(recipes, resolver):
+        if not saved:
+            raise RuntimeError('db down')
+        saved.append(recipes)
+        return len(recipes), 0
+
+    monkeypatch.setattr(Kitchen, 'get_page', get_page)
+    monkeypatch.setattr(scrape, 'save_recipes', save_recipes)
+
+    saved = []
+    with pytest.raises(RuntimeError):
+        scrape.crawl_pages(1, 1, concurrency=1)
+    assert scrape.load_validators() == {}
+
+    saved.append(None)
+    scrape.crawl_pages(1, 1, concurrency=1)
+    url = Kitchen().url.format(1)
+    assert scrape.load_validators() == {url: {'etag': f'"{url}"', 'last_modified': None}}
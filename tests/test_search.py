@@ -0,0 +1,22 @@
+# tests/test_search.py
+import pytest
+from sqlalchemy.dialects import mysql
+
+from models import Food
+from search import apply_search
+
+
+def compiled(term):
+    return str(apply_search(Food.query, Food.name, term).statement.compile(dialect=mysql.dialect()))
+
+
+@pytest.mark.parametrize('term', ['红烧', '糖醋排骨'])
+def test_cjk_terms_use_the_fulltext_index(app, term):
+    assert 'MATCH' in compiled(term)
+
+
+@pytest.mark.parametrize('term', ['鱼', 'admin', 'a', '可乐cola', 'ok2'])
+def test_short_or_ascii_terms_fall_back_to_like(app, term):
+    sql = compiled(term)
+    assert 'MATCH' not in sql
+    assert 'LIKE' in sql
@@ -0,0 +1,39 @@
+# tests/test_serializer.py
+import pytest
+from flask import Flask
+
+import serializer
+from decorators import response_format
+
+BACKENDS = [name for name, module in (('_dumps_orjson', serializer.orjson), ('_dumps_ujson', serializer.ujson),
+                                      ('_dumps_json', True)) if module]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_dumps_js_escapes_line_separators(monkeypatch, backend):
+    monkeypatch.setattr(serializer, 'dumps', getattr(serializer, backend))
+
+    data = serializer.dumps_js({'name': 'a\u2028b\u2029c'})
+
+    assert '\u2028' not in data and '\u2029' not in data
+    assert serializer.json.loads(data) == {'name': 'a\u2028b\u2029c'}
+
+
+def test_jsonp_response_escapes_line_separators():
+    app = Flask(__name__)
+
+    @app.route('/one')
+    @response_format
+    def one():
+        return {'name': 'a\u2028b'}
+
+    @app.route('/rows')
+    @response_format
+    def rows():
+        yield {'name': 'a\u2029b'}
+
+    client = app.test_client()
+    for url in ('/one?callback=cb', '/rows?callback=cb'):
+        body = client.get(url).get_data(as_text=True)
+        assert body.startswith('cb(')
+        assert '\u2028' not in body and '\u2029' not in body
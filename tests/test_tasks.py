@@ -0,0 +1,25 @@
+# tests/test_tasks.py
+import pytest
+
+import tasks
+from services import redis_client
+
+
+def test_daily_menu_push_releases_the_lock_when_it_fails(app, monkeypatch):
+    def build_menu_message():
+        raise RuntimeError('db down')
+
+    monkeypatch.setattr(tasks, 'build_menu_message', build_menu_message)
+    with pytest.raises(RuntimeError):
+        tasks.daily_menu_push('202610181405')
+    assert not redis_client.exists('lock:daily_menu_push:202610181405')
+
+
+def test_daily_menu_push_runs_once_per_tick(app, monkeypatch):
+    monkeypatch.setattr(tasks, 'build_menu_message', lambda: '菜单')
+    monkeypatch.setattr(tasks, 'get_push_device_keys', lambda: [])
+
+    assert tasks.daily_menu_push('202610181405') == {'tick': '202610181405', 'chunks': 0}
+    assert tasks.daily_menu_push('202610181405')['skipped']
+    # 同一天的另一个调度时刻不受影响
+    assert 'skipped' not in tasks.daily_menu_push('202610181805')
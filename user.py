@@ -2,7 +2,9 @@
 from flask import Blueprint, request, g
 import constants
 from decorators import login_required, response_format, admin_required
+from pagination import paginate
 from models import db, User
+from cache import sessions
 import hashlib
 
 user_bp = Blueprint('user', __name__)
@@ -53,6 +55,10 @@ def user_save():
 
     db.session.commit()
 
+    # 用户信息变更后同步到登录会话
+    if user_id:
+        sessions.update(user)
+
     return {"code": constants.RESULT_SUCCESS, "message": "操作成功"}
 
 # 获取所有用户
@@ -62,22 +68,17 @@ def user_save():
 @response_format
 def get_users():
     # 获取查询参数
-    page = request.args.get('page', 1, type=int)
-    page_size = request.args.get('pageSize', 10, type=int)
     username = request.args.get('username', '')
 
     # 构建查询
     query = User.query
 
-    # 如果有搜索关键词，添加过滤条件
+    # 用户名多为英文，ngram 全文索引受英文停用词影响，直接使用 LIKE 匹配
     if username:
         query = query.filter(User.username.ilike(f'%{username}%'))
 
-    # 获取总记录数
-    total = query.count()
-
-    # 分页查询
-    users = query.offset((page - 1) * page_size).limit(page_size).all()
+    # 分页查询（传入 after 时使用游标分页）
+    users, total, next_cursor = paginate(query, User.id)
 
     # 返回数据
     return {
@@ -89,7 +90,8 @@ def get_users():
                 'role': 'admin' if user.is_admin else 'user'
             } for user in users
         ],
-        'total': total
+        'total': total,
+        'next': next_cursor
     }
 
 
@@ -107,4 +109,5 @@ def delete_user():
 
     db.session.delete(user)
     db.session.commit()
+    sessions.delete(user_id)
     return {"code":constants.RESULT_SUCCESS,"message": "用户删除成功"}